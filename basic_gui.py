@@ -17,7 +17,11 @@ import tempfile
 from src.financeManager import FinanceManager
 
 
-from src.ai import AI
+from src.ai import AI, ADVISOR_STEPS
+
+
+
+RECORDS_PAGE_SIZE = 50
 
 
 
@@ -41,6 +45,10 @@ class FinanceApp:
 
             st.session_state.active_tab = "Dashboard"
 
+        if "record_cursors" not in st.session_state:
+
+            st.session_state.record_cursors = [None]
+
 
 
     def run(self):
@@ -71,11 +79,11 @@ class FinanceApp:
 
         st.header("Financial Overview")
 
-        all_data = self.fm.get_all_data()
+        monthly = self.fm.get_monthly_trend()
 
 
 
-        if not all_data:
+        if not monthly:
 
             st.info("No financial data found. Add some transactions in the 'Manage Records' tab to get started!")
 
@@ -83,19 +91,13 @@ class FinanceApp:
 
 
 
-        df = pd.DataFrame(all_data)
-
-        df['amount'] = pd.to_numeric(df['amount'])
-
-        df['date'] = pd.to_datetime(df['date'])
-
+        snapshot = self.fm.get_snapshot(top_n=7)
 
+        total_income = snapshot.total_income
 
-        total_income = self.fm.get_total_income()
+        total_expense = snapshot.total_expense
 
-        total_expense = self.fm.get_total_expense()
-
-        savings = self.fm.get_savings()
+        savings = snapshot.savings
 
 
 
@@ -121,9 +123,9 @@ class FinanceApp:
 
             st.subheader("📈 Monthly Trends")
 
-            monthly_trend = df.groupby([pd.Grouper(key='date', freq='M'), 'type'])['amount'].sum().unstack(fill_value=0).reset_index()
+            monthly_trend = pd.DataFrame(monthly).rename(columns={'total_income': 'income', 'total_expense': 'expense'})
 
-            monthly_trend['date'] = monthly_trend['date'].dt.strftime('%Y-%b')
+            monthly_trend['date'] = pd.to_datetime(monthly_trend['month'], format='%Y-%m').dt.strftime('%Y-%b')
 
             fig_trend = px.line(monthly_trend, x='date', y=['income', 'expense'], title="Income vs. Expense Over Time",
 
@@ -139,11 +141,9 @@ class FinanceApp:
 
             st.subheader("📁 Expense Categories")
 
-            expense_df = df[df['type'] == 'expense']
-
-            top_tags = expense_df.groupby('tag')['amount'].sum().nlargest(7).reset_index()
+            top_tags = pd.DataFrame(snapshot.top_expense_tags, columns=['tag', 'total'])
 
-            fig_pie = px.pie(top_tags, names='tag', values='amount', title="Top Expense Categories", hole=0.3)
+            fig_pie = px.pie(top_tags, names='tag', values='total', title="Top Expense Categories", hole=0.3)
 
             fig_pie.update_traces(textposition='inside', textinfo='percent+label')
 
@@ -153,7 +153,9 @@ class FinanceApp:
 
         st.subheader("🔍 Transaction Breakdown")
 
-        fig_sunburst = px.sunburst(df, path=['type', 'tag'], values='amount', title="Income & Expense Breakdown by Category")
+        breakdown = pd.DataFrame(self.fm.get_totals_by_type_and_tag())
+
+        fig_sunburst = px.sunburst(breakdown, path=['type', 'tag'], values='amount', title="Income & Expense Breakdown by Category")
 
         st.plotly_chart(fig_sunburst, use_container_width=True)
 
@@ -161,7 +163,9 @@ class FinanceApp:
 
         st.subheader("📄 Recent Transactions")
 
-        st.dataframe(df.sort_values(by='date', ascending=False).head(10))
+        st.dataframe(pd.DataFrame(self.fm.get_page(page_size=10, descending=True)))
+
+
 
 
 
@@ -221,9 +225,21 @@ class FinanceApp:
 
             st.subheader("✏️ Update or ❌ Delete a Transaction")
 
-            all_data = self.fm.get_all_data()
+            # Keyset pagination, newest first: each cursor is the (date, id) of the
+
+            # last row on the previous page, None for the first page.
+
+            cursors = st.session_state.record_cursors
+
+            page = self.fm.get_page(page_size=RECORDS_PAGE_SIZE, after=cursors[-1], descending=True)
 
-            if not all_data:
+            if not page:
+
+                if len(cursors) > 1:
+
+                    st.session_state.record_cursors = [None]
+
+                    st.rerun()
 
                 st.info("No data to manage.")
 
@@ -231,7 +247,25 @@ class FinanceApp:
 
 
 
-            df = pd.DataFrame(all_data)
+            col_prev, col_page, col_next = st.columns([1, 4, 1])
+
+            if col_prev.button("⬅️ Newer", disabled=len(cursors) == 1):
+
+                cursors.pop()
+
+                st.rerun()
+
+            col_page.caption(f"Page {len(cursors)} · showing {len(page)} transactions")
+
+            if col_next.button("Older ➡️", disabled=len(page) < RECORDS_PAGE_SIZE):
+
+                cursors.append((page[-1]['date'], page[-1]['id']))
+
+                st.rerun()
+
+
+
+            df = pd.DataFrame(page)
 
             df['display'] = df['date'].astype(str) + " | " + df['tag'] + " | ₹" + df['amount'].astype(str) + " (" + df['type'] + ")"
 
@@ -279,11 +313,17 @@ class FinanceApp:
 
                     if update_submitted:
 
-                        self.fm.update_data(record.id, new_tag, new_amount, new_date.strftime("%Y-%m-%d"), new_desc, new_type)
+                        try:
 
-                        st.success(f"Transaction ID {record.id} updated!")
+                            self.fm.update_data(record.id, new_tag, new_amount, new_date.strftime("%Y-%m-%d"), new_desc, new_type)
 
-                        st.rerun()
+                            st.success(f"Transaction ID {record.id} updated!")
+
+                            st.rerun()
+
+                        except ValueError as e:
+
+                            st.error(str(e))
 
                     if delete_submitted:
 
@@ -339,11 +379,11 @@ class FinanceApp:
 
                 uploaded_file = st.file_uploader("Upload CSV Statement", type="csv")
 
-                bank_name = st.text_input("Bank Name (e.g., pnb)", help="Used by the importer to parse correctly.")
+                bank_name = st.text_input("Bank Name (e.g., pnb)", help="Leave empty to detect the bank from the statement.")
 
                 if st.button("📥 Import Now"):
 
-                    if uploaded_file and bank_name:
+                    if uploaded_file:
 
                         with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmpfile:
 
@@ -355,9 +395,9 @@ class FinanceApp:
 
                         try:
 
-                            self.fm.extract_bank_statement_to_db(import_path, bank_name)
+                            result = self.fm.extract_bank_statement_to_db(import_path, bank_name or None)
 
-                            st.success("Bank statement imported successfully!")
+                            st.success(f"Bank statement imported successfully! Inserted {result['inserted']}, skipped {result['skipped']} duplicates.")
 
                             st.rerun()
 
@@ -367,9 +407,55 @@ class FinanceApp:
 
                     else:
 
-                        st.warning("Please upload a file and provide the bank name.")
+                        st.warning("Please upload a file.")
+
+
+
+
+
+    def stream_ai_report(self, user_answers):
+
+        """Run the advisor, showing each step as it finishes and the report while it is being written."""
+
+        status = st.status("Your AI Co-Pilot is analyzing your profile and drafting your report...", expanded=True)
+
+        draft = st.empty()
+
+        result = None
+
+        for event in self.ai.advisor_stream(user_answers):
+
+            if event["type"] == "node":
 
+                node, update = event["node"], event["update"]
 
+                if node in ADVISOR_STEPS:
+
+                    label = ADVISOR_STEPS[node]
+
+                    if node == "report_eval" and isinstance(update.get("report_eval"), dict):
+
+                        label += f" (score {update['report_eval'].get('overall_score', 'N/A')}/10)"
+
+                    status.write(f"✅ {label}")
+
+                elif node == "refine_gate" and not update.get("stop_reason"):
+
+                    status.write("🔄 Refining the report with the reviewer's feedback...")
+
+            elif event["type"] == "report":
+
+                draft.markdown(event["text"])
+
+            else:
+
+                result = event["result"]
+
+        draft.empty()
+
+        status.update(label="Analysis complete", state="complete", expanded=False)
+
+        return result
 
 
 
@@ -423,27 +509,25 @@ class FinanceApp:
 
                 else:
 
-                    with st.spinner("Your AI Co-Pilot is analyzing your profile and drafting your report..."):
-
-                        user_data = {
+                    user_data = {
 
-                            "goal": f"{goal} (Timeline: {goal_timeline})",
+                        "goal": f"{goal} (Timeline: {goal_timeline})",
 
-                            "age": age,
+                        "age": age,
 
-                            "dependents": dependents,
+                        "dependents": dependents,
 
-                            "income_source": income_source,
+                        "income_source": income_source,
 
-                            "income_stability": income_stability,
+                        "income_stability": income_stability,
 
-                            "bad_habit_concern": habit_concern,
+                        "bad_habit_concern": habit_concern,
 
-                            "existing_commitments": existing_commitments
+                        "existing_commitments": existing_commitments
 
-                        }
+                    }
 
-                        st.session_state.ai_report = self.ai.advisor({"user_answers": user_data})
+                    st.session_state.ai_report = self.stream_ai_report({"user_answers": user_data})
 
         
 
@@ -0,0 +1,62 @@
+"""Per-row cost of normalizing PNB dates and amounts: the strptime/float
+standardizer PNB used before against DateNormalizer + parse_paise.
+
+    python -m benchmarks.pnb_normalize [rows]
+"""
+from datetime import datetime
+import random
+import sys
+import timeit
+
+from src.Banks.normalize import DateNormalizer, parse_paise
+
+
+def make_rows(n, seed=1):
+    """[amount, date, desc, type] entries as sanitize_data yields them, with a
+    year of dates and realistic repetition of amounts."""
+    rng = random.Random(seed)
+    amounts = [f"{rng.randint(10, 50000):,}.{rng.choice(['00', '50', str(rng.randint(10, 99))])}" for _ in range(n // 4 or 1)]
+    return [
+        [rng.choice(amounts), f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024", "UPI/DR/123/shop", "expense"]
+        for _ in range(n)
+    ]
+
+
+def standardize_strptime(entries):
+    for data in entries:
+        data[1] = datetime.strptime(data[1], "%d/%m/%Y").strftime("%Y-%m-%d")
+        data[0] = float(data[0].strip().replace(",", ""))
+        yield data
+
+
+def standardize_fast(entries):
+    to_iso_date = DateNormalizer("%d/%m/%Y")
+    for data in entries:
+        data[1] = to_iso_date(data[1])
+        data[0] = parse_paise(data[0]) / 100
+        yield data
+
+
+def bench(standardize, rows, repeat=5):
+    def run():
+        parse_paise.cache_clear()  # every run starts cold, like a fresh import
+        for _ in standardize([list(row) for row in rows]):
+            pass
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / len(rows)
+
+
+def main(n=100_000):
+    rows = make_rows(n)
+    expected = list(standardize_strptime([list(row) for row in rows]))
+    assert list(standardize_fast([list(row) for row in rows])) == expected
+    copy_cost = min(timeit.repeat(lambda: [list(row) for row in rows], number=1, repeat=5)) / n
+    results = {name: bench(fn, rows) - copy_cost for name, fn in
+               [("strptime + float", standardize_strptime), ("slice + memo + paise", standardize_fast)]}
+    for name, per_row in results.items():
+        print(f"{name:>22}: {per_row * 1e6:6.2f} µs/row")
+    base, fast = results.values()
+    print(f"{'speedup':>22}: {base / fast:6.1f}x over {n} rows")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
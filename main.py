@@ -1,9 +1,13 @@
 
 import typer
 from src.financeManager import FinanceManager
+from src.importer import expand_statement_paths
+from src.Banks.registry import is_bank
 from colorama import Fore, Style
 from tabulate import tabulate
-import csv
+from itertools import batched
+from collections import Counter
+import os
 
 app = typer.Typer()
 fm = FinanceManager()
@@ -13,14 +17,15 @@ def main(ctx: typer.Context):
     if ctx.invoked_subcommand is None:
         typer.echo(Fore.CYAN + "\n📊 Full Financial Summary\n" + Style.RESET_ALL)
 
-        total_income = fm.get_total_income()
-        total_expense = fm.get_total_expense()
-        savings = fm.get_savings()
-        avg_income = fm.get_average_monthly_income()
-        avg_expense = fm.get_average_monthly_expense()
-        top_tags = fm.get_top_expense_tags()
-        trend = fm.get_last_n_months_trend()
-        large_expenses = fm.get_large_expenses()
+        snapshot = fm.get_snapshot()
+        total_income = snapshot.total_income
+        total_expense = snapshot.total_expense
+        savings = snapshot.savings
+        avg_income = snapshot.average_monthly_income
+        avg_expense = snapshot.average_monthly_expense
+        top_tags = snapshot.top_expense_tags
+        trend = snapshot.monthly_trend
+        large_expenses = snapshot.large_expenses
 
         typer.echo(Fore.GREEN + f"💰 Total Income: ₹{total_income}")
         typer.echo(Fore.RED + f"💸 Total Expense: ₹{total_expense}")
@@ -53,11 +58,23 @@ def add(tag: str, amount: float, date: str, desc: str, transaction_type: str = t
     typer.echo(Fore.GREEN + f"✅ Added ₹{amount} for '{tag}' on {date} ({transaction_type})" + Style.RESET_ALL)
 
 @app.command()
-def view_all():
-    data = fm.get_all_data()
-    if data:
-        typer.echo(tabulate(data, headers="keys", tablefmt="fancy_grid"))
-    else:
+def view_all(page_size: int = typer.Option(50, help="Rows per page"),
+             after_id: int = typer.Option(None, help="Start after this transaction ID"),
+             pages: int = typer.Option(0, help="Stop after this many pages (0 = all)")):
+    rows = fm.iter_transactions(page_size=page_size, after_id=after_id)
+    shown = 0
+    try:
+        for shown, page in enumerate(batched(rows, page_size), start=1):
+            typer.echo(Fore.CYAN + f"\n📄 Page {shown}" + Style.RESET_ALL)
+            typer.echo(tabulate(page, headers="keys", tablefmt="fancy_grid"))
+            if pages and shown >= pages:
+                if len(page) == page_size:  # a short page is the last one
+                    typer.echo(Fore.YELLOW + f"Continue with --after-id {page[-1]['id']}" + Style.RESET_ALL)
+                break
+    except ValueError as e:
+        typer.echo(Fore.RED + f"❌ {e}" + Style.RESET_ALL)
+        raise typer.Exit(1)
+    if not shown:
         typer.echo(Fore.RED + "No data available." + Style.RESET_ALL)
 
 @app.command()
@@ -83,7 +100,11 @@ def delete(id: int):
 
 @app.command()
 def update(id: int, tag: str, amount: float, date: str, desc: str, transaction_type: str):
-    fm.update_data(id, tag, amount, date, desc, transaction_type)
+    try:
+        fm.update_data(id, tag, amount, date, desc, transaction_type)
+    except ValueError as e:
+        typer.echo(Fore.RED + f"❌ {e}" + Style.RESET_ALL)
+        raise typer.Exit(1)
     typer.echo(Fore.BLUE + f"✏️ Updated ID {id} -> {tag}, ₹{amount}, {desc}, {transaction_type}" + Style.RESET_ALL)
 
 @app.command()
@@ -95,24 +116,125 @@ def summary_tag(tag: str):
         typer.echo(Fore.YELLOW + f"No entries with tag '{tag}'" + Style.RESET_ALL)
 
 @app.command()
-def export(path: str):
-    data = fm.get_all_data()
-    if not data:
+def export(path: str,
+           fmt: str = typer.Option("csv", "--format", help="Format: csv/jsonl/parquet/arrow"),
+           gzip: bool = typer.Option(False, "--gzip", help="Compress the output (zstd for arrow)"),
+           chunk_size: int = typer.Option(5000, help="Rows read and written per chunk")):
+    try:
+        count = fm.export_data(path, fmt, gzip, chunk_size)
+    except (ValueError, ImportError) as e:
+        typer.echo(Fore.RED + f"❌ {e}" + Style.RESET_ALL)
+        raise typer.Exit(1)
+    if not count:
         typer.echo(Fore.YELLOW + "No data available to export." + Style.RESET_ALL)
         return
-        
-    with open(path, 'w', newline='') as f:
-        fieldnames = data[0].keys()
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-    typer.echo(Fore.GREEN + f"✅ Exported data to {path}" + Style.RESET_ALL)
+    typer.echo(Fore.GREEN + f"✅ Exported {count} rows to {path}" + Style.RESET_ALL)
+
+@app.command()
+def import_statement(paths: list[str] = typer.Argument(..., help="Bank CSV files, glob patterns or directories"),
+                     bank: str = typer.Option(None, help="Bank name (e.g., pnb); detected from each file if omitted"),
+                     account: str = typer.Option(None, help="Account number, if the statements don't state it"),
+                     workers: int = typer.Option(None, help="Parallel parser processes (default: one per CPU)")):
+    # Old form: `import-statement statement.csv pnb`
+    if len(paths) > 1 and not os.path.exists(paths[-1]) and is_bank(paths[-1]):
+        bank = paths.pop()
+    files = expand_statement_paths(paths)
+    if not files:
+        typer.echo(Fore.YELLOW + "No statement files found." + Style.RESET_ALL)
+        raise typer.Exit(1)
+    inserted = skipped = failed = 0
+    for done, result in enumerate(fm.import_statements(files, bank, workers, account), start=1):
+        prefix = f"[{done}/{len(files)}] {result['file']}"
+        if "error" in result:
+            failed += 1
+            typer.echo(Fore.RED + f"{prefix}: ❌ {result['error']}" + Style.RESET_ALL)
+            continue
+        inserted += result['inserted']
+        skipped += result['skipped']
+        if result.get('already_imported'):
+            typer.echo(Fore.YELLOW + f"{prefix}: already imported, skipped" + Style.RESET_ALL)
+            continue
+        line = f"{prefix}: {result['inserted']} inserted, {result['skipped']} skipped"
+        if result['fast_forwarded']:
+            line += f" ({result['fast_forwarded']} older than the last import)"
+        typer.echo(line)
+    typer.echo(Fore.GREEN + f"📥 Imported and categorized transactions from {len(files) - failed} of {len(files)} file(s)" + (f" ({bank.upper()})" if bank else "") + Style.RESET_ALL)
+    typer.echo(f"   • Inserted: {inserted}  • Skipped (duplicates): {skipped}")
+    stats = fm.classifier.stats
+    typer.echo(f"   • Tag cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+    if failed:
+        raise typer.Exit(1)
+
+@app.command()
+def reclassify(since: str = typer.Option(None, help="Only re-tag transactions on/after this date (YYYY-MM-DD)"),
+               dry_run: bool = typer.Option(False, "--dry-run", help="Show what would change without writing"),
+               show: int = typer.Option(20, help="Changed rows to list on a dry run"),
+               overwrite_unknown: bool = typer.Option(False, "--overwrite-unknown", help="Also re-tag rows as 'unknown' when nothing matches them")):
+    """Re-tag existing transactions with the current keyword rules/tag model."""
+    result = fm.reclassify(since=since, dry_run=dry_run, overwrite_unknown=overwrite_unknown)
+    kept = f" ({result['kept']} kept their tag: no rule or model matches them)" if result['kept'] else ""
+    if dry_run:
+        changes = result['changes']
+        transitions = Counter((change['old_tag'], change['new_tag']) for change in changes)
+        if changes:
+            typer.echo(tabulate(changes[:show], headers="keys", tablefmt="grid"))
+            typer.echo(tabulate([(old, new, count) for (old, new), count in transitions.most_common()],
+                                headers=["old tag", "new tag", "rows"], tablefmt="grid"))
+        typer.echo(Fore.YELLOW + f"🔍 Dry run: {result['changed']} of {result['scanned']} transactions would be re-tagged{kept}" + Style.RESET_ALL)
+        return
+    typer.echo(Fore.GREEN + f"🏷️ Re-tagged {result['changed']} of {result['scanned']} transactions{kept}" + Style.RESET_ALL)
+
+@app.command()
+def train_classifier():
+    """Learn tags from your already-tagged transactions, used for narrations the keyword rules can't tag."""
+    try:
+        result = fm.train_classifier()
+    except ValueError as e:
+        typer.echo(Fore.RED + f"❌ {e}" + Style.RESET_ALL)
+        raise typer.Exit(1)
+    typer.echo(Fore.GREEN + f"🧠 Trained tag model on {result['rows']} transactions across {result['tags']} tags" + Style.RESET_ALL)
 
 @app.command()
-def import_statement(file: str = typer.Argument(..., help="Path to bank CSV file"),
-                     bank: str = typer.Argument(..., help="Bank name (e.g., pnb)")):
-    fm.extract_bank_statement_to_db(file, bank)
-    typer.echo(Fore.GREEN + f"📥 Imported and categorized transactions from {file} ({bank.upper()})" + Style.RESET_ALL)
+def advise(goal: str = typer.Option(..., prompt="🎯 What is your primary financial goal?"),
+           concern: str = typer.Option(..., prompt="⚠️ What is your biggest spending concern?"),
+           timeline: str = typer.Option("1-3 years", help="Timeline for the goal"),
+           age: str = typer.Option("", help="Your age"),
+           income_source: str = typer.Option("Salary", help="Main income source"),
+           commitments: str = typer.Option("", help="Existing loans or major investments")):
+    """Generate the AI financial report, streaming it as it is written."""
+    from src.ai import AI, ADVISOR_STEPS  # builds the LLM graph, so only when needed
+
+    user_data = {
+        "goal": f"{goal} (Timeline: {timeline})",
+        "age": age,
+        "income_source": income_source,
+        "bad_habit_concern": concern,
+        "existing_commitments": commitments
+    }
+    streamed = shown = ""  # report text of the round being written / the last round written
+    for event in AI().advisor_stream({"user_answers": user_data}):
+        if event["type"] == "report":
+            text = event["text"]
+            # Print only what's new; start over if the draft changed earlier on
+            typer.echo(text[len(streamed):] if text.startswith(streamed) else "\n" + text, nl=False)
+            streamed = text
+        elif event["type"] == "node" and event["node"] in ADVISOR_STEPS:
+            if streamed:
+                typer.echo()
+                shown = streamed
+            label = ADVISOR_STEPS[event["node"]]
+            report_eval = event["update"].get("report_eval")
+            if isinstance(report_eval, dict):
+                label += f" (score {report_eval.get('overall_score', 'N/A')}/10)"
+            typer.echo(Fore.CYAN + f"✅ {label}" + Style.RESET_ALL)
+            streamed = ""
+        elif event["type"] == "done":
+            result = event["result"]
+
+    report = (result.get("report") or {}).get("final_report")
+    if report and report != shown:
+        typer.echo(Fore.GREEN + "\n📄 Final report (best-scoring round):\n" + Style.RESET_ALL + report)
+    typer.echo(Fore.YELLOW + f"\n🏁 Stopped: {result.get('stop_reason')} after {len(result.get('report_iterations') or [])} round(s)" + Style.RESET_ALL)
 
 
 if __name__ == "__main__":
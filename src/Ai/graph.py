@@ -20,6 +20,7 @@ from typing import Optional
 
 from dotenv import load_dotenv
 from .schemas.deep_research import DeepResearchState
+from ..config import REPORT_TARGET_SCORE, REPORT_MAX_ITERATIONS, REPORT_TIME_BUDGET, REPORT_TOKEN_BUDGET
 import os
 
 load_dotenv()
@@ -93,11 +94,11 @@ builder.add_node("report_eval", report_eval_node)
 # Create intermediate synchronization nodes for coordination
 def sync_after_analysis(state):
     """Synchronization point after behavior and transaction"""
-    return state  # Just pass through the state
+    return {}  # Nothing to update (returning the state would re-append llm_calls)
 
 def sync_after_planning(state):
     """Synchronization point after goal and advice"""
-    return state  # Just pass through the state
+    return {}  # Nothing to update (returning the state would re-append llm_calls)
 
 builder.add_node("analysis_sync", sync_after_analysis)
 builder.add_node("planning_sync", sync_after_planning)
@@ -128,7 +129,56 @@ builder.add_edge("planning_sync", "report")
 # 7. After report, run report_eval
 builder.add_edge("report", "report_eval")
 
-# 8. Report eval decides: if satisfied -> END, else -> back to report
+# 8. After report_eval, record the round and keep the best report so far. The
+#    loop is bounded: it stops once a report is approved, or when another round
+#    would exceed the iteration, wall-clock or token budget (config.REPORT_*).
+def refine_gate(state):
+    """Record the report/eval round that just finished and decide whether another one fits the budgets"""
+    eval_data = state.report_eval if isinstance(state.report_eval, dict) else {}
+    score = eval_data.get("overall_score") or 0  # an eval that failed to parse scores 0
+    calls = [call for call in state.llm_calls if call["node"] in ("ReportNode", "ReportEvalNode")][-2:]
+    iteration = {
+        "iteration": len(state.report_iterations) + 1,
+        "score": score,
+        "is_completed": bool(eval_data.get("is_completed")),
+        "seconds": round(sum(call["seconds"] for call in calls), 3),
+        "tokens": sum(call["tokens"] for call in calls),
+        "cached": bool(calls) and all(call["cached"] for call in calls),
+    }
+    iterations = state.report_iterations + [iteration]
+    update = {"report_iterations": iterations}
+    if state.best_score is None or score > state.best_score:
+        update.update(best_report=state.report, best_report_eval=state.report_eval, best_score=score,
+                      best_iteration=iteration["iteration"])
+
+    # the next round is assumed to cost about as much as this one
+    elapsed = sum(i["seconds"] for i in iterations)
+    tokens = sum(i["tokens"] for i in iterations)
+    if iteration["is_completed"] and score >= REPORT_TARGET_SCORE:
+        update["stop_reason"] = "approved"
+    elif len(iterations) >= REPORT_MAX_ITERATIONS:
+        update["stop_reason"] = "max_iterations"
+    elif elapsed + iteration["seconds"] > REPORT_TIME_BUDGET:
+        update["stop_reason"] = "time_budget"
+    elif tokens + iteration["tokens"] > REPORT_TOKEN_BUDGET:
+        update["stop_reason"] = "token_budget"
+    else:
+        update["stop_reason"] = None
+    return update
+
+def select_best(state):
+    """Final answer: the best-scoring report of all rounds, not necessarily the last one"""
+    print(f"\n🏁 REPORT LOOP FINISHED ({state.stop_reason}) after {len(state.report_iterations)} round(s), best score {state.best_score}")
+    if state.best_iteration is not None and state.best_iteration != len(state.report_iterations):
+        return {"report": state.best_report, "report_eval": state.best_report_eval}
+    return {}
+
+builder.add_node("refine_gate", refine_gate)
+builder.add_node("select_best", select_best)
+builder.add_edge("report_eval", "refine_gate")
+builder.add_edge("select_best", END)
+
+# 9. Gate decides: if approved or out of budget -> best report, else -> back to report
 def eval_decision(state):
     print(f"\n🔍 EVALUATION DECISION:")
     print(f"  📊 Checking report quality...")
@@ -147,9 +197,12 @@ def eval_decision(state):
             print(f"   📈 Overall Score: {overall_score}")
             print(f"   💬 Feedback: {feedback[:150]}...")
 
-            if is_completed and overall_score >= 9:  # Lowered threshold for testing
+            if state.stop_reason == "approved":
                 print("   🎉 Report approved! Ending workflow.")
                 return "end"
+            elif state.stop_reason:
+                print(f"   ⏹️  Stopping refinement ({state.stop_reason}). Keeping the best report.")
+                return "end"
             else:
                 print("   🔄 Report needs improvement! Looping back to report generation...")
                 print(f"   📤 FEEDBACK WILL BE PASSED TO REPORT NODE:")
@@ -161,13 +214,14 @@ def eval_decision(state):
     return "end"
 
 builder.add_conditional_edges(
-    "report_eval",
+    "refine_gate",
     eval_decision,
-    {"end": END, "report": "report"}
+    {"end": "select_best", "report": "report"}
 )
 
-# Compile
-graph = builder.compile()
+# Compile. Every report round takes three steps (report, report_eval,
+# refine_gate), so the recursion limit grows with the iteration budget.
+graph = builder.compile().with_config(recursion_limit=10 + 3 * REPORT_MAX_ITERATIONS)
 # dot_string = graph.get_graph().to_dot()
 # with open("finance_graph.dot", "w") as f:
 #     f.write(dot_string)
@@ -202,6 +256,9 @@ async def run_async():
         eval_data = result.report_eval
         if isinstance(eval_data, dict):
             print(f"📊 Final Evaluation: {eval_data.get('overall_score', 'N/A')}/10")
+
+    for iteration in result.get("report_iterations", []):
+        print(f"   🔁 Round {iteration['iteration']}: score {iteration['score']}, {iteration['seconds']}s, {iteration['tokens']} tokens")
     
     return result
 
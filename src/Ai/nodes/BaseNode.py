@@ -1,12 +1,21 @@
 # your_project/nodes/base_node.py
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import time
 from langchain_core.language_models import BaseLanguageModel
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from langchain_core.exceptions import OutputParserException
 from langchain_core.runnables import Runnable
+from langchain_core.runnables.config import ensure_config, merge_configs
 from langchain.output_parsers import OutputFixingParser
 from ..prompts.Base import BasePrompt
+from ..utils.llm_cache import cache_key, default_llm_cache
+from ..utils.prompt_format import compact_collector_data, render_fields
+from ..utils.tokens import estimate_tokens
+from ...config import LLM_CACHE_ENABLED, COLLECTOR_DATA_TOKEN_BUDGET, COLLECTOR_TOP_TRANSACTIONS
 
 # Import your specific Pydantic state model
 from ..schemas.deep_research import DeepResearchState
@@ -16,13 +25,34 @@ class BaseNode(ABC):
     An abstract base class for nodes, designed to work with a Pydantic state model.
     This version is updated to handle multiple input keys.
     """
-    def __init__(self, llm: BaseLanguageModel):
+    # Token budget for the compact collector_data text this node's prompt gets.
+    collector_data_budget = COLLECTOR_DATA_TOKEN_BUDGET
+    # Which parts of each input the prompt gets: {state key: fields to keep, or
+    # None for all of them}. Listed inputs are rendered as short 'field: value'
+    # text instead of a dict repr; inputs not listed are passed as they are.
+    input_projection: Dict[str, Optional[Tuple[str, ...]]] = {}
+
+    def __init__(self, llm: BaseLanguageModel, cache=None):
         self.prompt_handler = self._get_prompt_handler()
         prompt = self.prompt_handler.get_prompt()
         base_parser = self.prompt_handler.get_parser()
         self_correcting_parser = OutputFixingParser.from_llm(llm=llm, parser=base_parser)
         self.chain: Runnable = prompt | llm | self_correcting_parser
 
+        # Response cache: outputs are reused while node, prompt template, model
+        # and input are all unchanged. Pass `cache` to use a different one.
+        if cache is None and LLM_CACHE_ENABLED:
+            cache = default_llm_cache()
+        self.cache = cache
+        template = self.prompt_handler.system_prompt() + self.prompt_handler.format_instructions
+        self.prompt_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+        self.model_id = self._model_id(llm)
+
+    @staticmethod
+    def _model_id(llm) -> str:
+        name = getattr(llm, "model_name", None) or getattr(llm, "model", None) or ""
+        return f"{llm.__class__.__name__}:{name}:{getattr(llm, 'temperature', None)}"
+
     # --- Abstract methods ---
 
     @abstractmethod
@@ -58,6 +88,7 @@ class BaseNode(ABC):
         # CHANGED: Build the input dictionary for the chain by gathering each
         # required key from the state object. Handle None values gracefully.
         input_data = {}
+        summaries = {}
         for key in input_keys:
             value = getattr(state, key)
             # Convert None values to empty string for template compatibility
@@ -77,11 +108,24 @@ class BaseNode(ABC):
                         print(f"    📄 Content: {str(value)[:100]}...")
                 else:
                     print(f"  📝 {key}: {'✅ Present' if value else '❌ Empty'}")
+                value = self._project(key, value, state.input_summaries, summaries)
                 input_data[key] = value
 
+        started = time.perf_counter()
+        key = None
+        if self.cache is not None:
+            key = cache_key(node_name, self.prompt_hash, self.model_id, input_data)
+            cached = self.cache.get(key)
+            if cached is not None:
+                print(f"⚡ {node_name} served from cache.")
+                return {output_key: cached, "llm_calls": [self._call_record(started, 0, cached=True)], "input_summaries": summaries}
+
+        usage = UsageMetadataCallbackHandler()
         try:
             # The chain is invoked with the dictionary containing all required inputs.
-            result = await self.chain.ainvoke(input_data)
+            # Added to the graph's own callbacks (not replacing them), so tracing
+            # and token streaming still see this call.
+            result = await self.chain.ainvoke(input_data, config=merge_configs(ensure_config(), {"callbacks": [usage]}))
             
             print(f"✅ {node_name} finished successfully.")
 
@@ -93,11 +137,56 @@ class BaseNode(ABC):
                 print("="*60)
 
             # The return structure remains the same: a dictionary to update the state.
-            return {output_key: result.dict()}
+            output = result.dict()
+            if key is not None:
+                self.cache.set(key, node_name, output)
+            tokens = self._tokens_used(usage, input_data, output)
+            return {output_key: output, "llm_calls": [self._call_record(started, tokens)], "input_summaries": summaries}
 
         except OutputParserException as e:
             print(f"❌ ERROR in {node_name}: The chain failed to parse the LLM's output.")
             return {
                 output_key: { "error": "LLM failed to produce a valid format." },
-                "error": f"Error in {node_name}: {str(e)}"
-            }
\ No newline at end of file
+                "error": f"Error in {node_name}: {str(e)}",
+                "llm_calls": [self._call_record(started, self._tokens_used(usage, input_data, None))],
+                "input_summaries": summaries
+            }
+
+    def _project(self, key, value, cached, new):
+        """The prompt text for one input: collector_data compacted to this node's
+        budget, projected inputs rendered down to their fields. Renderings are
+        reused from the state's input_summaries when the same input was already
+        rendered the same way, and new ones are added to `new`."""
+        if key == "collector_data":
+            spec = ("budget", self.collector_data_budget, COLLECTOR_TOP_TRANSACTIONS)
+        elif key in self.input_projection:
+            spec = self.input_projection[key]
+        else:
+            return value
+        digest = hashlib.sha1(json.dumps([spec, value], sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+        summary_key = f"{key}:{digest}"
+        if summary_key in cached:
+            return cached[summary_key]
+        if key == "collector_data":
+            text = compact_collector_data(value, self.collector_data_budget, COLLECTOR_TOP_TRANSACTIONS)
+        else:
+            text = render_fields(value, spec)
+        new[summary_key] = text
+        return text
+
+    def _call_record(self, started, tokens, cached=False) -> dict:
+        return {
+            "node": self.__class__.__name__,
+            "seconds": round(time.perf_counter() - started, 3),
+            "tokens": tokens,
+            "cached": cached,
+        }
+
+    def _tokens_used(self, usage, input_data, output) -> int:
+        """Tokens reported by the model, or an estimate from the prompt and output
+        text when it reports none."""
+        reported = sum(model_usage.get("total_tokens", 0) for model_usage in usage.usage_metadata.values())
+        if reported:
+            return reported
+        prompt = self.prompt_handler.get_prompt().format(**input_data)
+        return estimate_tokens(prompt) + estimate_tokens(json.dumps(output, default=str) if output else "")
\ No newline at end of file
@@ -9,6 +9,7 @@ class AdviceNode(BaseNode):
     """
     This class requires NO changes. It automatically works with DeepResearchState.
     """
+    input_projection = {"user_data": None, "transaction": None, "behavior": None}
     def _get_prompt_handler(self) -> BasePrompt:
         return AdvicePrompt()
 
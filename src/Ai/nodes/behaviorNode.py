@@ -9,6 +9,7 @@ class BehaviorNode(BaseNode):
     """
     This class requires NO changes. It automatically works with DeepResearchState.
     """
+    input_projection = {"user_data": None}
     def _get_prompt_handler(self) -> BasePrompt:
         return BehaviourPrompt()
 
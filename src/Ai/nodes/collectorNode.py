@@ -1,4 +1,5 @@
 from ...financeManager import FinanceManager
+from ...config import COLLECTOR_TOP_TRANSACTIONS
 
 
 
@@ -18,22 +19,20 @@ class CollectorNode:
             # Pydantic model format (new)
             answers = getattr(state, 'user_data', None)
             
-        income = self.fm.get_total_income()
-        expense = self.fm.get_total_expense()
-        savings = self.fm.get_savings()
-        trend = self.fm.get_last_n_months_trend()
-        top_tags = self.fm.get_top_expense_tags()
-        big_txns = self.fm.get_large_expenses()
+        # Every expense over the threshold would grow with the ledger; the
+        # prompts only ever show the largest few.
+        snapshot = self.fm.get_snapshot(large_limit=COLLECTOR_TOP_TRANSACTIONS)
 
         structured_data = {
             "additional_user_data": answers,
             "financial_data": {
-                "income": income,
-                "expense": expense,
-                "savings": savings,
-                "monthly_trend": trend,
-                "top_expense_tags": top_tags,
-                "large_transactions": big_txns,
+                "income": snapshot.total_income,
+                "expense": snapshot.total_expense,
+                "savings": snapshot.savings,
+                "monthly_trend": snapshot.monthly_trend,
+                "top_expense_tags": snapshot.top_expense_tags,
+                "large_transactions": snapshot.large_expenses,
+                "large_transactions_count": snapshot.large_expense_count,
             }
         }
 
@@ -9,6 +9,8 @@ class ReportEvalNode(BaseNode):
     """
     This class requires NO changes. It automatically works with DeepResearchState.
     """
+    # The report's own notes on its tone and language aren't what gets graded.
+    input_projection = {"report": ("report_title", "final_report")}
     def _get_prompt_handler(self) -> BasePrompt:
         return ReportEvalPrompt()
 
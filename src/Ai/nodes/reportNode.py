@@ -10,6 +10,16 @@ class ReportNode(BaseNode):
     This class now implements `_get_input_keys` to provide all the
     necessary data to its prompt.
     """
+    # Only what the report is written from: every refinement round resends these.
+    collector_data_budget = BaseNode.collector_data_budget // 2
+    input_projection = {
+        "user_data": None,
+        "transaction": None,
+        "behavior": ("financial_archetype", "risk_tolerance", "behavioral_trait"),
+        "goal": ("goal_title", "realistic_target", "honest_assessment", "steps", "priority"),
+        "advice": ("advice_title", "advice_details", "implementation_steps"),
+        "report_eval": ("overall_score", "feedback"),
+    }
     def _get_prompt_handler(self) -> BasePrompt:
         return ReportPrompt()
 
@@ -9,6 +9,9 @@ class TransactionNode(BaseNode):
     """
     This class requires NO changes. It automatically works with DeepResearchState.
     """
+    # The collector data is all this node reads, so it gets a bigger share.
+    collector_data_budget = 2 * BaseNode.collector_data_budget
+
     def _get_prompt_handler(self) -> BasePrompt:
         return transactionPrompt()
 
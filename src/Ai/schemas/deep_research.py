@@ -1,7 +1,11 @@
 from pydantic import BaseModel
-from typing import Optional, Dict
+from typing import Annotated, Optional, Dict, List
+import operator
 
 
+def merge_dicts(left: Dict, right: Dict) -> Dict:
+    return {**left, **right}
+
 
 class DeepResearchState(BaseModel):
     user_data: Optional[Dict] = None
@@ -14,4 +18,17 @@ class DeepResearchState(BaseModel):
     report: Optional[Dict] = None
     report_eval: Optional[Dict] = None
     error : Optional[str] = None
-    
\ No newline at end of file
+    # One record per LLM node call (node, seconds, tokens, cached), appended by BaseNode.
+    llm_calls: Annotated[List[Dict], operator.add] = []
+    # Report refinement loop: one record per report/eval round (score, seconds,
+    # tokens), the best report so far (and its round) and why the loop stopped.
+    report_iterations: List[Dict] = []
+    best_report: Optional[Dict] = None
+    best_report_eval: Optional[Dict] = None
+    best_score: Optional[float] = None
+    best_iteration: Optional[int] = None
+    stop_reason: Optional[str] = None
+    
+    # Prompt-ready renderings of projected inputs (see BaseNode.input_projection),
+    # keyed by node input, fields and a digest of the value, so each is built once per run.
+    input_summaries: Annotated[Dict[str, str], merge_dicts] = {}
\ No newline at end of file
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import time
+
+from peewee import SqliteDatabase, Model, CharField, TextField, FloatField
+
+from ...config import LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES
+
+# Separate from the finance database: it is disposable, and advisor runs
+# shouldn't contend with imports for the ledger's write lock.
+llm_cache_db = SqliteDatabase(None, pragmas={"journal_mode": "wal", "synchronous": "normal"}, check_same_thread=False)
+
+
+class LLMCacheEntry(Model):
+    key = CharField(unique=True)
+    node = CharField()
+    value = TextField()  # JSON of the node's output
+    created_at = FloatField()
+    accessed_at = FloatField(index=True)
+
+    class Meta:
+        database = llm_cache_db
+        table_name = "llm_cache"
+
+
+def cache_key(node, prompt_hash, model_id, input_data):
+    """Content address of one LLM call: the same node, prompt template, model
+    and (canonicalized) input always give the same key."""
+    payload = json.dumps(
+        {"node": node, "prompt": prompt_hash, "model": model_id, "input": input_data},
+        sort_keys=True, default=str, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed cache of node outputs with a TTL and an LRU size cap.
+    Counts hits and misses for this process (see `stats`). All instances share
+    one database file per process."""
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        if llm_cache_db.database is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            llm_cache_db.init(str(path))
+            with llm_cache_db.connection_context():
+                llm_cache_db.create_tables([LLMCacheEntry])
+        elif llm_cache_db.database != str(path):
+            raise ValueError(f"The LLM cache is already open at {llm_cache_db.database}")
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with llm_cache_db.connection_context():
+            size = LLMCacheEntry.select().count()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": size,
+            "max_entries": self.max_entries,
+        }
+
+    def get(self, key):
+        """Cached output for `key`, or None if absent or expired."""
+        now = time.time()
+        with llm_cache_db.connection_context():
+            entry = LLMCacheEntry.get_or_none(LLMCacheEntry.key == key)
+            if entry is not None and now - entry.created_at > self.ttl:
+                entry.delete_instance()
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            LLMCacheEntry.update(accessed_at=now).where(LLMCacheEntry.id == entry.id).execute()
+        self.hits += 1
+        return json.loads(entry.value)
+
+    def set(self, key, node, value):
+        now = time.time()
+        with llm_cache_db.connection_context():
+            with llm_cache_db.atomic():
+                LLMCacheEntry.insert(
+                    key=key, node=node, value=json.dumps(value, default=str),
+                    created_at=now, accessed_at=now
+                ).on_conflict_replace().execute()
+                LLMCacheEntry.delete().where(LLMCacheEntry.created_at < now - self.ttl).execute()
+                overflow = LLMCacheEntry.select().count() - self.max_entries
+                if overflow > 0:
+                    oldest = LLMCacheEntry.select(LLMCacheEntry.id).order_by(LLMCacheEntry.accessed_at).limit(overflow)
+                    LLMCacheEntry.delete().where(LLMCacheEntry.id.in_(oldest)).execute()
+
+    def clear(self):
+        with llm_cache_db.connection_context():
+            LLMCacheEntry.delete().execute()
+
+
+_default_cache = None
+
+def default_llm_cache():
+    """The process-wide cache at LLM_CACHE_PATH, created on first use."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LLMResponseCache()
+    return _default_cache
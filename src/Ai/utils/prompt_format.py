@@ -0,0 +1,91 @@
+from .tokens import estimate_tokens
+
+DESCRIPTION_CHARS = 40
+
+
+def _number(value):
+    """Whole rupees (or the value itself if it isn't a number)."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    return int(round(value))
+
+
+def _cell(value):
+    text = str(_number(value)) if value is not None else ""
+    return text.replace(",", " ").replace("\n", " ").strip()
+
+
+def _table(title, columns, rows):
+    lines = [f"{title} ({','.join(columns)}):"]
+    lines.extend(",".join(_cell(row.get(column)) for column in columns) for row in rows)
+    return "\n".join(lines)
+
+
+def _largest(transactions, top_n):
+    """The `top_n` largest transactions, ties broken by date then description so
+    the order never depends on how the database returned them."""
+    ranked = sorted(transactions, key=lambda t: (-(t.get("amount") or 0), str(t.get("date")), str(t.get("desc"))))
+    return [
+        {**t, "desc": str(t.get("desc") or "")[:DESCRIPTION_CHARS]}
+        for t in ranked[:top_n]
+    ]
+
+
+def compact_collector_data(collector_data, token_budget, top_n=10):
+    """CollectorNode's output as a short, deterministic text block for prompts:
+    key=value lines for the user's answers and totals, CSV-style tables for the
+    monthly trend, top tags and the `top_n` largest transactions, with amounts
+    rounded to whole rupees.
+
+    The result stays within `token_budget` (see estimate_tokens): large
+    transactions are dropped first, and anything still over is cut off.
+    """
+    if not isinstance(collector_data, dict):
+        return collector_data or ""
+    answers = collector_data.get("additional_user_data") or {}
+    financial = collector_data.get("financial_data") or {}
+    transactions = financial.get("large_transactions") or []
+
+    head = []
+    if answers:
+        head.append("user: " + "; ".join(f"{key}={_cell(value)}" for key, value in sorted(answers.items())))
+    head.append("totals: " + "; ".join(
+        f"{key}={_cell(financial.get(key, 0))}" for key in ("income", "expense", "savings")
+    ))
+    head.append(_table("monthly_trend", ("month", "income", "expense"), financial.get("monthly_trend") or []))
+    head.append(_table("top_expense_tags", ("tag", "total"), financial.get("top_expense_tags") or []))
+    head = "\n".join(head)
+
+    def render(count):
+        if not transactions:
+            return head
+        shown = _largest(transactions, count)
+        total = financial.get("large_transactions_count", len(transactions))
+        title = f"large_transactions, largest {len(shown)} of {total}"
+        return head + "\n" + _table(title, ("date", "amount", "tag", "desc"), shown)
+
+    count = min(top_n, len(transactions))
+    text = render(count)
+    while count and estimate_tokens(text) > token_budget:
+        count //= 2
+        text = render(count)
+    if estimate_tokens(text) > token_budget:
+        text = text[:max(token_budget * 4 - 3, 0)] + "..."
+    return text
+
+
+def render_fields(value, fields=None):
+    """A node output (dict) as 'field: value' lines, keeping only `fields` (in
+    that order) when given. Lists are joined with '; ', missing fields skipped.
+    Anything that isn't a dict is returned as text unchanged."""
+    if not isinstance(value, dict):
+        return value if isinstance(value, str) else str(value)
+    lines = []
+    for field in fields or sorted(value):
+        if field not in value:
+            continue
+        item = value[field]
+        if isinstance(item, (list, tuple)):
+            item = "; ".join(str(part) for part in item)
+        lines.append(f"{field}: {item}")
+    return "\n".join(lines)
@@ -0,0 +1,4 @@
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), for budgets when a
+    model doesn't report usage."""
+    return (len(text) + 3) // 4
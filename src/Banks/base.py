@@ -2,19 +2,35 @@ from abc import ABC, abstractmethod
 
 
 class Base(ABC):
+    """Bank statement parser.
+
+    Parsing is a lazy pipeline of generators, read -> sanitize_data ->
+    standardize_data, so a statement is processed one row at a time and
+    never held in memory as a whole.
+    """
     def __init__(self,file_path):
         self.file_path = file_path
+        self.account = None  # account number from the statement header, once read() has reached it
         
+    @classmethod
+    def sniff(cls, lines):
+        """Whether the first lines of a file look like this bank's statement
+        (used to auto-detect the bank)."""
+        return False
+
     @abstractmethod
     def read(self):
+        """Yield the raw transaction rows of the statement."""
         pass
 
     @abstractmethod
-    def sanitize_data(self):
+    def sanitize_data(self, rows):
+        """Yield [amount, date, desc, type] entries from raw rows."""
         pass
 
     @abstractmethod
-    def standardize_data(self):
+    def standardize_data(self, entries):
+        """Yield entries with normalized values (float amount, YYYY-MM-DD date)."""
         pass
 
     @abstractmethod
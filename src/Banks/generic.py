@@ -0,0 +1,96 @@
+from .base import Base
+from .normalize import DateNormalizer, parse_paise
+import csv
+import os
+import re
+
+class ColumnMappedCSV(Base):
+    """CSV statement parser driven by a BANK_FORMATS entry (see config) instead
+    of code. Use `for_format` to get a parser class for one configured bank."""
+    FORMAT = None
+    # Values of a "type" column, when the format doesn't list its own (matched
+    # case-insensitively); anything else in that column is an error.
+    TYPES = {"income": ("income", "credit", "cr"), "expense": ("expense", "debit", "dr")}
+
+    @classmethod
+    def for_format(cls, name, fmt):
+        return type(f"{cls.__name__}[{name}]", (cls,), {"FORMAT": fmt, "to_iso_date": DateNormalizer(fmt["date_format"])})
+
+    @classmethod
+    def _header_columns(cls):
+        return list(cls.FORMAT["columns"].values())
+
+    @classmethod
+    def _is_header(cls, line):
+        cells = {cell.strip().strip('"') for cell in line.split(",")}
+        return all(column in cells for column in cls._header_columns())
+
+    @classmethod
+    def sniff(cls, lines):
+        return any(cls._is_header(line) for line in lines)
+
+    def _transaction_lines(self, lines):
+        footer = self.FORMAT.get("footer")
+        account = self.FORMAT.get("account")
+        for row in lines:
+            if self._is_header(row):
+                yield row
+                break
+            match = account and re.search(account, row)
+            if match:
+                self.account = match.group(1)
+        else:
+            raise ValueError("Transaction history Not Found")
+        for row in lines:
+            if footer and footer in row:
+                return
+            if self._is_header(row):
+                continue
+            yield row
+
+    def read(self):
+        extension_name = os.path.splitext(self.file_path)[1][1:].lower()
+        if extension_name != "csv":
+            raise ValueError("Unknown Extension Used")
+        with open(self.file_path, 'r', newline='') as f:
+            yield from csv.DictReader(self._transaction_lines(f), skipinitialspace=True)
+
+    def _type_lookup(self):
+        types = self.FORMAT.get("types", self.TYPES)
+        return {value.lower(): transaction_type for transaction_type, values in types.items() for value in values}
+
+    def sanitize_data(self, rows):
+        columns = self.FORMAT["columns"]
+        types = self._type_lookup()
+        for data in rows:
+            date, desc = data.get(columns["date"]), data.get(columns["desc"])
+            if "amount" in columns:
+                amount = (data.get(columns["amount"]) or "").strip()
+                if not amount:
+                    continue
+                if "type" in columns:
+                    value = (data.get(columns["type"]) or "").strip()
+                    if value.lower() not in types:
+                        raise ValueError(f"Unknown transaction type {value!r} in column {columns['type']!r} (expected one of: {', '.join(types)})")
+                    yield [amount, date, desc, types[value.lower()]]
+                elif amount.startswith("-"):
+                    yield [amount[1:], date, desc, "expense"]
+                else:
+                    yield [amount, date, desc, "income"]
+                continue
+            if data.get(columns["withdrawal"]):
+                yield [data.get(columns["withdrawal"]), date, desc, "expense"]
+            if data.get(columns["deposit"]):
+                yield [data.get(columns["deposit"]), date, desc, "income"]
+
+    def standardize_data(self, entries):
+        to_iso_date = self.to_iso_date
+        for data in entries:
+            data[1] = to_iso_date(data[1].strip())
+            data[0] = parse_paise(data[0]) / 100
+            yield data
+
+    @property
+    def entries(self):
+        """yields in order money date desc type, one statement row at a time"""
+        return self.standardize_data(self.sanitize_data(self.read()))
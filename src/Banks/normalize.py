@@ -0,0 +1,74 @@
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+import re
+
+# Formats made of %d, %m and %Y with one-character separators have every field
+# at a fixed offset, so they can be sliced instead of going through strptime.
+_FIXED_FORMAT_RE = re.compile(r"%([dmY])([^%])%([dmY])([^%])%([dmY])")
+_FIELD_WIDTHS = {"d": 2, "m": 2, "Y": 4}
+
+
+class DateNormalizer:
+    """Statement date -> 'YYYY-MM-DD'.
+
+    Fixed-width formats such as '%d/%m/%Y' are parsed by slicing, and each
+    distinct date string is parsed once and then served from a memo dict
+    (a statement has at most a few hundred distinct dates). Anything the fast
+    path doesn't recognise goes through strptime, so the same strings are
+    accepted and rejected (ValueError) as before.
+    """
+
+    def __init__(self, date_format="%d/%m/%Y", memo_size=100_000):
+        self.date_format = date_format
+        self.memo_size = memo_size
+        self._memo = {}
+        self._layout = self._fixed_layout(date_format)
+
+    @staticmethod
+    def _fixed_layout(date_format):
+        """(length, {field: slice}, [(offset, separator)]) or None."""
+        match = _FIXED_FORMAT_RE.fullmatch(date_format)
+        if not match or sorted(match.group(1, 3, 5)) != ["Y", "d", "m"]:
+            return None
+        fields, separators = match.group(1, 3, 5), match.group(2, 4)
+        slices, separator_offsets, offset = {}, [], 0
+        for i, field in enumerate(fields):
+            slices[field] = slice(offset, offset + _FIELD_WIDTHS[field])
+            offset += _FIELD_WIDTHS[field]
+            if i < 2:
+                separator_offsets.append((offset, separators[i]))
+                offset += 1
+        return offset, slices, separator_offsets
+
+    def __call__(self, text):
+        iso = self._memo.get(text)
+        if iso is None:
+            iso = self._parse(text)
+            if len(self._memo) < self.memo_size:
+                self._memo[text] = iso
+        return iso
+
+    def _parse(self, text):
+        if self._layout is not None:
+            length, slices, separators = self._layout
+            if len(text) == length and all(text[offset] == separator for offset, separator in separators):
+                year, month, day = text[slices["Y"]], text[slices["m"]], text[slices["d"]]
+                if (year + month + day).isdigit():
+                    date(int(year), int(month), int(day))  # ValueError for impossible dates, like strptime
+                    return f"{year}-{month}-{day}"
+        return datetime.strptime(text, self.date_format).strftime("%Y-%m-%d")
+
+
+@lru_cache(maxsize=65536)
+def parse_paise(text):
+    """Amount string such as '1,234.5' -> 123450 paise, exactly (no float
+    rounding). Cached, as statements repeat the same amounts a lot."""
+    value = text.strip().replace(",", "")
+    rupees, _, paise = value.partition(".")
+    if rupees.isdigit() and len(paise) <= 2 and (not paise or paise.isdigit()):
+        return int(rupees) * 100 + int(paise.ljust(2, "0"))
+    try:
+        return int((Decimal(value) * 100).to_integral_value())
+    except InvalidOperation:
+        raise ValueError(f"could not convert string to amount: {text!r}") from None
@@ -1,37 +1,54 @@
 from .base import Base
-from datetime import datetime
+from .normalize import DateNormalizer, parse_paise
 import csv
 import os
+import re
 
 class PNB(Base):
+    HEADER_MARKER = "Transaction Date"
+    FOOTER_MARKER = "Unless"
+    ACCOUNT_RE = re.compile(r"Account Number\W*([\w-]+)")
+    to_iso_date = DateNormalizer("%d/%m/%Y")
+
     def __init__(self, file_path):
         super().__init__(file_path)
-        self.__data = []
+
+    @classmethod
+    def sniff(cls, lines):
+        return any(cls.HEADER_MARKER in line and "Narration" in line for line in lines)
     
 
+    def _transaction_lines(self, lines):
+        """Yield the transaction table: the header row, then every line up to the footer.
+        Repeated header rows (e.g. one per statement page) are dropped, and the
+        account number is picked up from the lines above the table."""
+        for row in lines:
+            if self.HEADER_MARKER in row:
+                yield row
+                break
+            match = self.ACCOUNT_RE.search(row)
+            if match:
+                self.account = match.group(1)
+        else:
+            raise ValueError("Transaction history Not Found")
+        for row in lines:
+            if self.FOOTER_MARKER in row:
+                return
+            if self.HEADER_MARKER in row:
+                continue
+            yield row
+
     def read_by_csv(self):
-        self.__data.clear()
-        with open(self.file_path,'r') as f:
-            lines = f.readlines()
-            start_index =-1
-            end_index = -1
-            for n,row in enumerate(lines):
-                if "Transaction Date" in row:
-                    start_index = n
-                elif "Unless" in row:
-                    end_index = n
-            if start_index == -1:
-                raise ValueError("Transaction history Not Found")
-            transaction_history = lines[start_index:end_index]
-            reader = csv.DictReader(transaction_history,skipinitialspace=True)
+        with open(self.file_path,'r',newline='') as f:
+            reader = csv.DictReader(self._transaction_lines(f),skipinitialspace=True)
             for transaction in reader:
-                self.__data.append(transaction)
+                yield transaction
     
 
     def read(self):
         extension_name = os.path.splitext(self.file_path)[1][1:].lower()  # gives 'csv' or 'pdf'
         if extension_name == "csv":
-            self.read_by_csv()
+            return self.read_by_csv()
         elif extension_name == "pdf":
             raise NotImplementedError("The following Format is not Implemented Till Now")
         else:
@@ -39,26 +56,23 @@ class PNB(Base):
 
 
     
-    def sanitize_data(self):
-        self.__entries = []
-        for data in self.__data:
+    def sanitize_data(self, rows):
+        for data in rows:
             if data.get('Withdrawal'):
-                self.__entries.append([data.get('Withdrawal'),data.get('Transaction Date'),data.get('Narration'),"expense"])
+                yield [data.get('Withdrawal'),data.get('Transaction Date'),data.get('Narration'),"expense"]
             if data.get("Deposit"):
-                self.__entries.append([data.get('Deposit'),data.get('Transaction Date'),data.get('Narration'),"income"])
+                yield [data.get('Deposit'),data.get('Transaction Date'),data.get('Narration'),"income"]
 
     
-    def standardize_data(self):
-        for data in self.__entries:
-            data[1] = datetime.strptime(data[1], "%d/%m/%Y").strftime("%Y-%m-%d")
-            data[0] = float(data[0].strip().replace(",",""))
+    def standardize_data(self, entries):
+        to_iso_date = self.to_iso_date
+        for data in entries:
+            data[1] = to_iso_date(data[1])
+            data[0] = parse_paise(data[0]) / 100
+            yield data
 
     @property
     def entries(self):
-        """returns in order money date desc type"""
-        self.read()
-        self.sanitize_data()
-        self.standardize_data()
-        return self.__entries
+        """yields in order money date desc type, one statement row at a time"""
+        return self.standardize_data(self.sanitize_data(self.read()))
     
-
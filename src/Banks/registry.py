@@ -0,0 +1,58 @@
+from functools import cache
+from importlib import import_module
+from itertools import islice
+
+from ..config import BANK_FORMATS
+
+# Built-in parsers as "module:Class" specs, imported only when a bank is used.
+BANK_PARSERS = {
+    "pnb": ".pnb:PNB",
+}
+# Third-party packages can add banks by exposing `Base` subclasses under this
+# entry-point group, e.g. [project.entry-points."finance_manager.banks"] hdfc = "pkg.hdfc:HDFC"
+ENTRY_POINT_GROUP = "finance_manager.banks"
+# How many lines from the top of a statement are shown to each parser's sniff()
+SNIFF_LINES = 50
+
+
+@cache
+def _entry_points():
+    from importlib.metadata import entry_points
+    return {ep.name.lower(): ep for ep in entry_points(group=ENTRY_POINT_GROUP)}
+
+def _bank_names():
+    """Built-in and configured banks first; installed plugins are only looked up
+    if those run out."""
+    yield from BANK_PARSERS
+    yield from BANK_FORMATS
+    yield from (name for name in _entry_points() if name not in BANK_PARSERS and name not in BANK_FORMATS)
+
+def available_banks():
+    return list(_bank_names())
+
+def is_bank(name):
+    name = name.lower()
+    return name in BANK_PARSERS or name in BANK_FORMATS or name in _entry_points()
+
+@cache
+def get_parser(name):
+    """Parser class (a `Base` subclass) for a bank name, imported on first use."""
+    name = name.lower()
+    if name in BANK_PARSERS:
+        module, _, attr = BANK_PARSERS[name].partition(":")
+        return getattr(import_module(module, __package__), attr)
+    if name in BANK_FORMATS:
+        from .generic import ColumnMappedCSV
+        return ColumnMappedCSV.for_format(name, BANK_FORMATS[name])
+    if name in _entry_points():
+        return _entry_points()[name].load()
+    raise NotImplementedError(f"Bank '{name}' isn't supported. Available: {', '.join(available_banks())}")
+
+def detect_bank(file_path):
+    """Name of the first bank whose parser recognises the top of `file_path`."""
+    with open(file_path, 'r', newline='', errors='replace') as f:
+        head = list(islice(f, SNIFF_LINES))
+    for name in _bank_names():
+        if get_parser(name).sniff(head):
+            return name
+    raise ValueError(f"Could not detect the bank of {file_path}; pass the bank name ({', '.join(available_banks())})")
@@ -3,4 +3,15 @@ from abc import ABC,abstractmethod
 class BaseClassifier(ABC):
     @abstractmethod
     def classify(self):
-        pass
\ No newline at end of file
+        pass
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the classifier's configuration, so cached tags are only
+        reused by an identically configured classifier."""
+        return self.__class__.__name__
+
+    def classify_batch(self, descriptions) -> list[str]:
+        """Tags for a whole batch of descriptions, in order.
+        The default classifies one at a time; subclasses override it with a bulk path."""
+        return [self.classify(description) for description in descriptions]
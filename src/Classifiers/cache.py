@@ -0,0 +1,115 @@
+from collections import OrderedDict
+import re
+
+from .base import BaseClassifier
+
+# Dates like 05/09/2024 or 5-9-24, and any run of 3+ digits (UPI/IMPS reference
+# numbers, account numbers, amounts). Shorter digit runs are kept so keywords
+# such as "p2p" still match.
+_DATE_RE = re.compile(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}")
+_NUMBER_RE = re.compile(r"\d{3,}")
+
+
+def normalize_narration(description: str) -> str:
+    """Cache key for a narration: lowercased, with dates and reference numbers
+    replaced by '#', so repeats of the same merchant/handle share one entry."""
+    text = _DATE_RE.sub("#", description.lower())
+    return _NUMBER_RE.sub("#", text).strip()
+
+
+class CachedClassifier(BaseClassifier):
+    """Bounded LRU cache of normalized narration -> tag in front of another classifier.
+
+    The wrapped classifier sees the normalized narration, so a cached tag is always
+    the tag that classifier would give. With a `store` (see DatabaseManager's
+    load_tag_cache/save_tag_cache) the cache is warmed from, and saved back to,
+    the database, keyed on the wrapped classifier's fingerprint so a changed
+    keyword map never reuses stale tags.
+    """
+
+    def __init__(self, classifier, maxsize=10000, store=None):
+        self.classifier = classifier
+        self.maxsize = maxsize
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._unsaved = {}
+        if store is not None:
+            self._cache.update(store.load_tag_cache(self.fingerprint, maxsize))
+
+    @property
+    def fingerprint(self) -> str:
+        return self.classifier.fingerprint
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+        }
+
+    def _remember(self, key, tag):
+        self._cache[key] = tag
+        self._unsaved[key] = tag
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def classify(self, description: str) -> str:
+        key = normalize_narration(description)
+        tag = self._cache.get(key)
+        if tag is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return tag
+        self.misses += 1
+        tag = self.classifier.classify(key)
+        self._remember(key, tag)
+        return tag
+
+    def classify_batch(self, descriptions) -> list[str]:
+        tags = []
+        missing = {}  # key -> positions in the batch still waiting for a tag
+        for position, description in enumerate(descriptions):
+            key = normalize_narration(description)
+            tag = self._cache.get(key)
+            if tag is not None:
+                self.hits += 1
+                self._cache.move_to_end(key)
+            elif key in missing:
+                self.hits += 1  # a repeat within the batch shares the first one's lookup
+                missing[key].append(position)
+            else:
+                self.misses += 1
+                missing[key] = [position]
+            tags.append(tag)
+        if missing:
+            # Every distinct miss goes to the wrapped classifier in one call.
+            for key, tag in zip(missing, self.classifier.classify_batch(list(missing))):
+                self._remember(key, tag)
+                for position in missing[key]:
+                    tags[position] = tag
+        return tags
+
+    def take_unsaved(self) -> dict:
+        """Entries learned since the last save/take, handing them off to the caller
+        (e.g. a worker process reporting back to the parent's cache)."""
+        unsaved, self._unsaved = self._unsaved, {}
+        return unsaved
+
+    def merge(self, entries, hits=0, misses=0):
+        """Add entries (and lookup counts) learned by another copy of this cache."""
+        for key, tag in entries.items():
+            self._remember(key, tag)
+        self.hits += hits
+        self.misses += misses
+
+    def save(self):
+        """Persist entries learned since the last save to the store."""
+        unsaved = self.take_unsaved()
+        if self.store is not None and unsaved:
+            self.store.save_tag_cache(self.fingerprint, unsaved, self.maxsize)
@@ -0,0 +1,26 @@
+from .base import BaseClassifier
+
+
+class FallbackClassifier(BaseClassifier):
+    """Ask `primary` first and hand only the narrations it leaves "unknown" to
+    `fallback` (e.g. rules first, then the statistical model)."""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+
+    @property
+    def fingerprint(self) -> str:
+        return f"{self.primary.fingerprint}+{self.fallback.fingerprint}"
+
+    def classify(self, description: str) -> str:
+        return self.classify_batch([description])[0]
+
+    def classify_batch(self, descriptions) -> list[str]:
+        descriptions = list(descriptions)
+        tags = self.primary.classify_batch(descriptions)
+        unknown = [position for position, tag in enumerate(tags) if tag == "unknown"]
+        if unknown:
+            for position, tag in zip(unknown, self.fallback.classify_batch([descriptions[i] for i in unknown])):
+                tags[position] = tag
+        return tags
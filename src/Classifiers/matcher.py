@@ -0,0 +1,106 @@
+from collections import deque
+import re
+
+# Runs of letters/digits are words; any other non-space character (e.g. the '@'
+# of a UPI handle or the '/' separators) is a token of its own.
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[^a-z0-9\s]")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over a fixed set of keywords.
+
+    Every keyword carries an integer priority (lower wins). `best_match` walks
+    the text once and returns the best priority among all keywords occurring
+    anywhere in it, so its cost depends on the length of the text and not on
+    how many keywords there are.
+    """
+    NO_MATCH = float("inf")
+
+    def __init__(self, keywords):
+        """keywords: iterable of (keyword, priority) pairs."""
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [self.NO_MATCH]
+        for keyword, priority in keywords:
+            self._add(keyword, priority)
+        self._build()
+
+    def _add(self, keyword, priority):
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(self.NO_MATCH)
+            state = next_state
+        self._best[state] = min(self._best[state], priority)
+
+    def _build(self):
+        """Breadth-first pass wiring failure links. Each state's best priority also
+        covers the keywords that end at its failure states (its suffixes)."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[next_state] = fail
+                self._best[next_state] = min(self._best[next_state], self._best[fail])
+                queue.append(next_state)
+
+    def best_match(self, text):
+        """Lowest priority of any keyword found in `text`, or None."""
+        goto, fail, best = self._goto, self._fail, self._best
+        result = best[0]  # only set if an empty keyword was added
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if best[state] < result:
+                result = best[state]
+                if result == 0:
+                    break  # nothing can beat the highest priority
+        return None if result == self.NO_MATCH else result
+
+
+class TokenIndex:
+    """Inverted index from keyword tokens to priorities (lower wins).
+
+    Keywords only match whole tokens, so 'to' matches "sent to ravi" but not
+    "tofu", and multi-word keywords ('room rent') match as consecutive tokens.
+    A narration is matched by intersecting its token set with the index
+    instead of scanning every keyword.
+    """
+
+    def __init__(self, keywords):
+        """keywords: iterable of (keyword, priority) pairs."""
+        self._words = {}    # single-token keyword -> priority
+        self._phrases = {}  # first token -> [(token tuple, priority)] for multi-word keywords
+        for keyword, priority in keywords:
+            tokens = tuple(tokenize(keyword))
+            if len(tokens) == 1:
+                self._words[tokens[0]] = min(priority, self._words.get(tokens[0], priority))
+            elif tokens:
+                self._phrases.setdefault(tokens[0], []).append((tokens, priority))
+
+    def best_match(self, text):
+        """Lowest priority of any keyword whose tokens appear in `text`, or None."""
+        tokens = tokenize(text)
+        words = self._words
+        result = min((words[token] for token in words.keys() & tokens), default=None)
+        if self._phrases:
+            for start in range(len(tokens)):
+                for phrase, priority in self._phrases.get(tokens[start], ()):
+                    if (result is None or priority < result) and tuple(tokens[start:start + len(phrase)]) == phrase:
+                        result = priority
+        return result
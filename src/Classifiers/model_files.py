@@ -0,0 +1,11 @@
+from pathlib import Path
+
+# File names of a saved NaiveBayesTagClassifier. Kept apart from statistical.py
+# so checking for a trained model doesn't import numpy.
+WEIGHTS_FILE = "weights.npy"
+META_FILE = "meta.json"
+
+
+def model_exists(path) -> bool:
+    path = Path(path)
+    return (path / WEIGHTS_FILE).exists() and (path / META_FILE).exists()
@@ -1,14 +1,44 @@
+import hashlib
+import json
+
 from .base import BaseClassifier
-from ..config import CATEGORY_KEYWORDS
+from .matcher import KeywordAutomaton, TokenIndex
+from ..config import CATEGORY_KEYWORDS, CLASSIFIER_MATCH_MODE
 
 class RuleBasedTagClassifier(BaseClassifier):
-    def __init__(self, keyword_map=None):
+    MATCHERS = {
+        "token": TokenIndex,
+        "substring": KeywordAutomaton,
+    }
+
+    def __init__(self, keyword_map=None, mode=None):
         self.keyword_map = keyword_map or CATEGORY_KEYWORDS
+        self.mode = mode or CLASSIFIER_MATCH_MODE
+        if self.mode not in self.MATCHERS:
+            raise ValueError(f"Unknown match mode '{self.mode}'. Use one of: {', '.join(self.MATCHERS)}")
+        # Tags are tried in keyword_map order: the first tag with any matching
+        # keyword wins, so a keyword's priority is its tag's position.
+        self._tags = list(self.keyword_map)
+        self._matcher = self.MATCHERS[self.mode](
+            (word, priority)
+            for priority, tag in enumerate(self._tags)
+            for word in self.keyword_map[tag]
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        keywords = json.dumps([self.mode, list(self.keyword_map.items())])
+        return f"{self.__class__.__name__}:{hashlib.sha1(keywords.encode('utf-8')).hexdigest()[:16]}"
 
     def classify(self, description: str) -> str:
-        desc = description.lower()
-        for tag, keywords in self.keyword_map.items():
-            for word in keywords:
-                if word in desc:
-                    return tag
-        return "unknown"
+        priority = self._matcher.best_match(description.lower())
+        if priority is None:
+            return "unknown"
+        return self._tags[priority]
+
+    def classify_batch(self, descriptions) -> list[str]:
+        """Narrations repeat heavily within a statement, so each distinct one is
+        matched once and the result fanned back out."""
+        descriptions = list(descriptions)
+        tags = {description: self.classify(description) for description in dict.fromkeys(descriptions)}
+        return [tags[description] for description in descriptions]
@@ -0,0 +1,131 @@
+from pathlib import Path
+import hashlib
+import json
+import zlib
+
+import numpy as np
+
+from .base import BaseClassifier
+from .cache import normalize_narration
+from .model_files import WEIGHTS_FILE, META_FILE, model_exists
+
+
+def hashed_ngrams(description, n_buckets, ngram_range):
+    """Bucket ids of the character n-grams of a normalized narration."""
+    text = f" {normalize_narration(description)} "
+    low, high = ngram_range
+    return [
+        zlib.crc32(text[start:start + size].encode("utf-8")) % n_buckets
+        for size in range(low, high + 1)
+        for start in range(len(text) - size + 1)
+    ]
+
+
+class NaiveBayesTagClassifier(BaseClassifier):
+    """Multinomial naive Bayes over hashed character n-grams, trained offline on
+    the user's own tagged transactions.
+
+    Weights are a (n_buckets, n_tags) float32 array of log-likelihoods saved as
+    .npy and memory-mapped on load, so the model opens in milliseconds and a
+    whole batch is scored with one gather + reduceat over that array.
+    Predictions below `min_confidence` are returned as "unknown".
+    """
+    WEIGHTS_FILE = WEIGHTS_FILE
+    META_FILE = META_FILE
+
+    def __init__(self, tags, weights, log_priors, checksum, n_buckets=2**16, ngram_range=(3, 5), min_confidence=0.6):
+        self.tags = list(tags)
+        self.weights = weights
+        self.log_priors = np.asarray(log_priors, dtype=np.float32)
+        self.checksum = checksum
+        self.n_buckets = n_buckets
+        self.ngram_range = tuple(ngram_range)
+        self.min_confidence = min_confidence
+
+    @property
+    def fingerprint(self) -> str:
+        return f"{self.__class__.__name__}:{self.checksum}"
+
+    # --- training / persistence ---
+
+    @classmethod
+    def train(cls, descriptions, tags, n_buckets=2**16, ngram_range=(3, 5), alpha=0.1, min_confidence=0.6):
+        """Fit on parallel sequences of narrations and their tags."""
+        labels = sorted(set(tags))
+        label_ids = {tag: i for i, tag in enumerate(labels)}
+
+        buckets, columns = [], []
+        class_counts = np.zeros(len(labels), dtype=np.float64)
+        for description, tag in zip(descriptions, tags):
+            features = hashed_ngrams(description, n_buckets, ngram_range)
+            buckets.extend(features)
+            columns.extend([label_ids[tag]] * len(features))
+            class_counts[label_ids[tag]] += 1
+        counts = np.bincount(
+            np.asarray(buckets, dtype=np.int64) * len(labels) + np.asarray(columns, dtype=np.int64),
+            minlength=n_buckets * len(labels)
+        ).reshape(n_buckets, len(labels))
+
+        # Laplace-smoothed log P(bucket | tag)
+        totals = counts.sum(axis=0) + alpha * n_buckets
+        weights = np.log((counts + alpha) / totals).astype(np.float32)
+        log_priors = np.log(class_counts / class_counts.sum())
+        checksum = hashlib.sha1(weights.tobytes()).hexdigest()[:16]
+        return cls(labels, weights, log_priors, checksum, n_buckets, ngram_range, min_confidence)
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / self.WEIGHTS_FILE, np.ascontiguousarray(self.weights))
+        meta = {
+            "tags": self.tags,
+            "log_priors": self.log_priors.tolist(),
+            "checksum": self.checksum,
+            "n_buckets": self.n_buckets,
+            "ngram_range": list(self.ngram_range),
+            "min_confidence": self.min_confidence,
+        }
+        (path / self.META_FILE).write_text(json.dumps(meta, indent=2))
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        meta = json.loads((path / cls.META_FILE).read_text())
+        weights = np.load(path / cls.WEIGHTS_FILE, mmap_mode="r")
+        return cls(meta["tags"], weights, meta["log_priors"], meta["checksum"],
+                   meta["n_buckets"], meta["ngram_range"], meta["min_confidence"])
+
+    @classmethod
+    def exists(cls, path):
+        return model_exists(path)
+
+    # --- prediction ---
+
+    def predict_proba(self, descriptions):
+        """(n_descriptions, n_tags) posterior probabilities. Narrations too short
+        to yield any n-gram get a uniform row."""
+        features = [hashed_ngrams(description, self.n_buckets, self.ngram_range) for description in descriptions]
+        lengths = np.array([len(f) for f in features], dtype=np.int64)
+        has_features = lengths > 0
+
+        scores = np.zeros((len(features), len(self.tags)), dtype=np.float32)
+        if has_features.any():
+            flat = np.fromiter((bucket for f in features for bucket in f), dtype=np.int64, count=int(lengths.sum()))
+            offsets = np.concatenate(([0], np.cumsum(lengths[has_features])[:-1]))
+            scores[has_features] = self.log_priors + np.add.reduceat(self.weights[flat], offsets, axis=0)
+
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def classify(self, description: str) -> str:
+        return self.classify_batch([description])[0]
+
+    def classify_batch(self, descriptions) -> list[str]:
+        descriptions = list(descriptions)
+        if not descriptions:
+            return []
+        probabilities = self.predict_proba(descriptions)
+        best = probabilities.argmax(axis=1)
+        confident = probabilities[np.arange(len(descriptions)), best] >= self.min_confidence
+        return [self.tags[i] if ok else "unknown" for i, ok in zip(best, confident)]
@@ -1,13 +1,51 @@
 # src/ai.py
 
 from .Ai.graph import graph  # your compiled LangGraph
-from typing import Dict
+from .Ai.utils.llm_cache import default_llm_cache
+from langchain_core.utils.json import parse_partial_json
+from typing import AsyncIterator, Dict, Iterator, Optional
 import asyncio
+import json
+import queue
+import threading
+
+# What each finished graph node means, for progress displays. Bookkeeping
+# nodes (sync points, refine_gate, select_best) are left out.
+ADVISOR_STEPS = {
+    "collector": "Collected your financial data",
+    "behavior": "Profiled your money habits",
+    "transaction": "Analyzed your transactions",
+    "goal": "Planned your goals",
+    "advice": "Drafted recommendations",
+    "report": "Wrote the report",
+    "report_eval": "Reviewed the report",
+}
+
+
+def partial_report_text(buffer: str) -> Optional[str]:
+    """The `final_report` text so far from the report node's (still incomplete)
+    JSON output, or None if it hasn't started yet."""
+    start = buffer.find("{")
+    if start < 0:
+        return None
+    try:
+        parsed = parse_partial_json(buffer[start:])
+    except json.JSONDecodeError:
+        return None
+    if isinstance(parsed, dict) and isinstance(parsed.get("final_report"), str):
+        return parsed["final_report"]
+    return None
+
 
 class AI:
     def __init__(self):
         pass
 
+    @property
+    def cache_stats(self) -> Dict:
+        """Hit/miss counts of the LLM response cache in this process."""
+        return default_llm_cache().stats
+
     def advisor(self, user_answers: Dict) -> Dict:
         """
         Run the financial advisor agent with user input.
@@ -16,10 +54,67 @@ class AI:
         input_state = {
             "user_data": user_answers  # Updated to match new state format
         }
-        
+
         # Run the async graph in a synchronous context
         result = asyncio.run(graph.ainvoke(input_state))
 
+        return self._result(result)
+
+    async def advisor_events(self, user_answers: Dict) -> AsyncIterator[Dict]:
+        """
+        Run the advisor and yield its progress as it happens:
+          {"type": "node", "node": name, "update": {...}} whenever a graph node finishes,
+          {"type": "report", "text": ...} with the report written so far, while the
+              report node is still generating it (restarts on every refinement round),
+          {"type": "done", "result": {...}} last, with what `advisor` returns.
+        """
+        buffer, text, state = "", None, {}
+        async for mode, chunk in graph.astream(
+            {"user_data": user_answers}, stream_mode=["updates", "messages", "values"]
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                if metadata.get("langgraph_node") != "report" or not isinstance(message.content, str):
+                    continue
+                buffer += message.content
+                partial = partial_report_text(buffer)
+                if partial and partial != text:
+                    text = partial
+                    yield {"type": "report", "text": text}
+            elif mode == "updates":
+                for node, update in chunk.items():
+                    if node == "report":
+                        buffer, text = "", None  # the next round streams a new report
+                    yield {"type": "node", "node": node, "update": update or {}}
+            else:
+                state = chunk
+        yield {"type": "done", "result": self._result(state)}
+
+    def advisor_stream(self, user_answers: Dict) -> Iterator[Dict]:
+        """
+        advisor_events for synchronous callers (Streamlit, the CLI). The graph
+        runs on its own event loop in a background thread and every event is
+        handed over as soon as it arrives.
+        """
+        events = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for event in self.advisor_events(user_answers):
+                    events.put(event)
+            except Exception as e:
+                events.put(e)
+            finally:
+                events.put(finished)
+
+        threading.Thread(target=asyncio.run, args=(pump(),), daemon=True).start()
+        while (event := events.get()) is not finished:
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+    def _result(self, result: Dict) -> Dict:
         return {
             "collector_data": result.get("collector_data"),
             "transaction": result.get("transaction"),
@@ -27,5 +122,8 @@ class AI:
             "goal": result.get("goal"),
             "advice": result.get("advice"),
             "report": result.get("report"),
-            "report_eval": result.get("report_eval")
+            "report_eval": result.get("report_eval"),
+            "report_iterations": result.get("report_iterations"),
+            "stop_reason": result.get("stop_reason"),
+            "llm_calls": result.get("llm_calls")
         }
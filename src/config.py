@@ -11,6 +11,21 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 DB_PATH = BASE_DIR / "data" / "finance.db"
 
+# Pragmas applied to every new SQLite connection. WAL lets the dashboard and
+# CLI read while an import is writing.
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -64 * 1024,  # negative = KiB, so 64 MB of page cache
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "memory",
+}
+
+# Connections are pooled and reused across DatabaseManager calls instead of
+# being opened and closed for every query.
+DB_MAX_CONNECTIONS = 8
+DB_STALE_TIMEOUT = 300  # seconds an idle pooled connection is kept
+
 
 
 
@@ -25,3 +40,59 @@ CATEGORY_KEYWORDS = {
     "transfer": ["p2p", "p2v", "upi", "to", "from", "@", "imps", "rtgs"],
     "unknown": []  # fallback
 }
+
+# How RuleBasedTagClassifier matches CATEGORY_KEYWORDS: "token" matches whole
+# words only (so "to" does not match inside "tofu"); "substring" matches
+# keywords anywhere in the narration.
+CLASSIFIER_MATCH_MODE = "token"
+
+# Where `train-classifier` saves the statistical tag model. When present it is
+# consulted for narrations the keyword rules leave as "unknown".
+TAG_MODEL_DIR = BASE_DIR / "data" / "tag_model"
+
+# Column-mapped CSV statement formats, usable as a bank name by the importer and
+# auto-detected from their header row. "columns" maps date/desc plus either
+# withdrawal/deposit, or amount (with an optional income/expense "type" column;
+# without one, negative amounts are expenses) to the CSV's column names.
+# Optional: "footer" (a line marking the end of the table), "account" (a regex
+# whose first group captures the account number from the lines above the table)
+# and "types" ({"income": [...], "expense": [...]}, the values the "type" column
+# may hold; income/credit/cr and expense/debit/dr by default).
+BANK_FORMATS = {
+    # CSV files written by `export`
+    "ledger": {
+        "columns": {"date": "date", "desc": "desc", "amount": "amount", "type": "type"},
+        "date_format": "%Y-%m-%d",
+    },
+    # e.g. a bank with separate debit/credit columns:
+    # "mybank": {
+    #     "columns": {"date": "Txn Date", "desc": "Description", "withdrawal": "Debit", "deposit": "Credit"},
+    #     "date_format": "%d %b %Y",
+    #     "footer": "Closing Balance",
+    #     "account": r"Account No\W*(\d+)",
+    # },
+}
+
+# Persistent cache of LLM node outputs (see src/Ai/utils/llm_cache.py), keyed on
+# node, prompt, model and input, so re-running the advisor on unchanged data
+# makes no API calls. Entries expire after LLM_CACHE_TTL seconds; beyond
+# LLM_CACHE_MAX_ENTRIES the least recently used are dropped.
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = BASE_DIR / "data" / "llm_cache.db"
+LLM_CACHE_TTL = 7 * 24 * 60 * 60
+LLM_CACHE_MAX_ENTRIES = 2000
+
+# Report refinement loop (report -> report_eval -> report ...): stop once a
+# report is approved with at least REPORT_TARGET_SCORE, or when another round
+# would exceed the iteration, wall-clock (seconds) or token budget. The
+# best-scoring report so far is returned.
+REPORT_TARGET_SCORE = 9
+REPORT_MAX_ITERATIONS = 3
+REPORT_TIME_BUDGET = 180
+REPORT_TOKEN_BUDGET = 60_000
+
+# Collector data in prompts: at most COLLECTOR_TOP_TRANSACTIONS large
+# transactions, and about COLLECTOR_DATA_TOKEN_BUDGET tokens per node (nodes
+# can override BaseNode.collector_data_budget), however big the ledger gets.
+COLLECTOR_TOP_TRANSACTIONS = 10
+COLLECTOR_DATA_TOKEN_BUDGET = 600
@@ -1,106 +1,296 @@
 
-from peewee import fn, Case
-from .models import Finance, db
+from peewee import fn, Case, chunked, IntegrityError
+from .models import Finance, MonthlyTagSummary, TagCacheEntry, ImportLog, db, row_values, to_paise
+from .snapshot import FinancialSnapshot
 
 
 # To make this a runnable, self-contained file, the database and model
 # definitions are included here. In a real application, these would
 # likely be in a separate 'models.py' file.
 
+# Columns returned by the row-level fetch_* methods; row_hash and year_month
+# are internal bookkeeping and stay out of tables and exports.
+TRANSACTION_FIELDS = (Finance.id, Finance.tag, Finance.amount, Finance.date, Finance.desc, Finance.type)
+
+_BULK_INSERT_COLUMNS = ('tag', 'amount', 'date', 'desc', 'type', 'year_month', 'row_hash')
+_BULK_INSERT_SQL = 'INSERT OR IGNORE INTO "{}" ({}) VALUES ({})'.format(
+    Finance._meta.table_name,
+    ', '.join(f'"{name}"' for name in _BULK_INSERT_COLUMNS),
+    ', '.join('?' for _ in _BULK_INSERT_COLUMNS)
+)
+
+def _add_delta(deltas, values, sign=1):
+    """Accumulate a row's contribution to MonthlyTagSummary into `deltas` (in paise)."""
+    key = (values['year_month'], values['tag'], values['type'])
+    total, count = deltas.get(key, (0, 0))
+    deltas[key] = (total + sign * to_paise(values['amount']), count + sign)
+    return deltas
+
+def _rupees(aggregate):
+    """Read a SUM/AVG of paise back as rupees; peewee does not pass aggregates
+    through the field's python_value by itself."""
+    return aggregate.converter(MonthlyTagSummary.total.python_value)
+
+def _sum_by_type(transaction_type):
+    """SUM of the rollup totals of one transaction type, in rupees."""
+    return _rupees(fn.SUM(Case(None, [(MonthlyTagSummary.type == transaction_type, MonthlyTagSummary.total)], 0)))
+
+def _filter_conditions(filters):
+    """Translate a filters dict into Finance where-clause expressions."""
+    conditions = []
+    for key, value in (filters or {}).items():
+        if value is None:
+            continue
+        if key == 'tag':
+            conditions.append(Finance.tag == value)
+        elif key == 'type':
+            conditions.append(Finance.type == value)
+        elif key == 'month':
+            conditions.append(Finance.year_month == value)
+        elif key == 'date':
+            conditions.append(Finance.date == value)
+        elif key == 'since':
+            conditions.append(Finance.date >= value)
+        elif key == 'until':
+            conditions.append(Finance.date <= value)
+        else:
+            raise ValueError(f"Unknown transaction filter: {key}")
+    return conditions
+
 class DatabaseManager:
     def insert_data(self, tag, amount, date, desc, transaction_type):
+        values = row_values(tag, amount, date, desc, transaction_type)
         with db.connection_context():
-            exists = Finance.select().where(
-                (Finance.tag == tag) &
-                (Finance.amount == amount) &
-                (Finance.date == date) &
-                (Finance.desc == desc) &
-                (Finance.type == transaction_type)
-            ).exists()
-
-            if not exists:
-                Finance.create(
-                    tag=tag,
-                    amount=amount,
-                    date=date,
-                    desc=desc,
-                    type=transaction_type
-                )
-                return True
-            return False
+            with db.atomic():
+                inserted = Finance.insert(**values).on_conflict_ignore().as_rowcount().execute()
+                if inserted == 1:
+                    MonthlyTagSummary.apply(_add_delta({}, values))
+            return inserted == 1
+
+    def bulk_insert_entries(self, entries, batch_size=500, import_log=None):
+        """Insert many (tag, amount, date, desc, type) rows in a single transaction.
+
+        Rows that already exist in the table, or repeat within `entries`, are skipped.
+        `import_log` (ImportLog field values, or a function returning them once
+        `entries` is consumed; None to log nothing) is recorded in the same
+        transaction, so a statement is only logged if its rows were stored.
+        Returns a dict with the number of `inserted` and `skipped` rows.
+        """
+        inserted = skipped = 0
+        with db.connection_context():
+            with db.atomic():
+                for batch in chunked(entries, batch_size):
+                    rows, deltas = {}, {}
+                    for entry in batch:
+                        values = row_values(*entry)
+                        if values['row_hash'] in rows:
+                            skipped += 1
+                            continue
+                        rows[values['row_hash']] = values
+                    # Earlier batches are already in the table (same transaction),
+                    # so this lookup also catches repeats across batches.
+                    existing = Finance.select(Finance.row_hash).where(Finance.row_hash.in_(list(rows)))
+                    for row in existing:
+                        del rows[row.row_hash]
+                        skipped += 1
+                    # One prepared statement for the whole batch; building a
+                    # multi-row insert_many query costs more than the insert itself.
+                    db.cursor().executemany(_BULK_INSERT_SQL, [
+                        (values['tag'], to_paise(values['amount']), str(values['date']), values['desc'],
+                         values['type'], values['year_month'], values['row_hash'])
+                        for values in rows.values()
+                    ])
+                    for values in rows.values():
+                        _add_delta(deltas, values)
+                    MonthlyTagSummary.apply(deltas)
+                    inserted += len(rows)
+                if callable(import_log):
+                    import_log = import_log()
+                if import_log is not None:
+                    ImportLog.insert(**import_log).on_conflict_replace().execute()
+        return {'inserted': inserted, 'skipped': skipped}
+
+    def fetch_imported(self, checksums):
+        """{checksum: logged row count} for the given file checksums already imported."""
+        with db.connection_context():
+            query = ImportLog.select(ImportLog.checksum, ImportLog.rows).where(ImportLog.checksum.in_(list(checksums)))
+            return dict(query.tuples())
+
+    def fetch_import_watermarks(self):
+        """{account: latest transaction date imported for it}."""
+        with db.connection_context():
+            query = (ImportLog
+                     .select(ImportLog.account, fn.MAX(ImportLog.max_date))
+                     .where(ImportLog.account.is_null(False) & ImportLog.max_date.is_null(False))
+                     .group_by(ImportLog.account))
+            return {account: str(max_date) for account, max_date in query.tuples()}
 
     def delete_by_id(self, id):
         with db.connection_context():
-            query = Finance.delete().where(Finance.id == id)
-            query.execute()
+            with db.atomic():
+                old = Finance.select(*TRANSACTION_FIELDS, Finance.year_month).where(Finance.id == id).dicts().first()
+                if old is None:
+                    return
+                Finance.delete().where(Finance.id == id).execute()
+                MonthlyTagSummary.apply(_add_delta({}, old, sign=-1))
 
     def update_by_id(self, id, tag, amount, date, desc, transaction_type):
+        """Raises ValueError (and changes nothing) if the edit would make the row
+        a copy of another transaction."""
+        values = row_values(tag, amount, date, desc, transaction_type)
+        with db.connection_context():
+            try:
+                with db.atomic():
+                    old = Finance.select(*TRANSACTION_FIELDS, Finance.year_month).where(Finance.id == id).dicts().first()
+                    if old is None:
+                        return
+                    Finance.update(**values).where(Finance.id == id).execute()
+                    deltas = _add_delta({}, old, sign=-1)
+                    MonthlyTagSummary.apply(_add_delta(deltas, values))
+            except IntegrityError:  # row_hash is unique
+                raise ValueError(f"Transaction ID {id} would be a duplicate of an existing transaction")
+
+    def iter_tag_rows(self, since=None, page_size=5000):
+        """Yield the columns re-tagging needs (id, tag, desc, amount, type,
+        year_month) in id order, page by page. Skipping the date column avoids
+        parsing a date per row, which dominates the cost of iter_transactions.
+        """
+        query = Finance.select(Finance.id, Finance.tag, Finance.desc, Finance.amount, Finance.type, Finance.year_month)
+        if since is not None:
+            query = query.where(Finance.date >= since)
+        last_id = 0
+        while True:
+            with db.connection_context():
+                page = list(query.where(Finance.id > last_id).order_by(Finance.id).limit(page_size).dicts())
+            yield from page
+            if len(page) < page_size:
+                return
+            last_id = page[-1]['id']
+
+    def retag(self, changes):
+        """Set new tags on many rows in one transaction.
+
+        `changes` is an iterable of (row, new_tag) where row is a dict with id,
+        tag, amount, type and year_month (see iter_tag_rows). The tag is not
+        part of the row hash, so only the tag column and the rollup change.
+        Returns the number of rows updated.
+        """
+        params, deltas = [], {}
+        for row, tag in changes:
+            params.append((tag, row['id']))
+            _add_delta(deltas, row, sign=-1)
+            _add_delta(deltas, {**row, 'tag': tag})
+        if not params:
+            return 0
+        with db.connection_context():
+            with db.atomic():
+                db.cursor().executemany(f'UPDATE "{Finance._meta.table_name}" SET "tag" = ? WHERE "id" = ?', params)
+                MonthlyTagSummary.apply(deltas)
+        return len(params)
+
+    def rebuild_summary(self, months=None):
+        """Recompute the monthly/tag rollup from the Finance table."""
         with db.connection_context():
-            query = Finance.update({
-                Finance.tag: tag,
-                Finance.amount: amount,
-                Finance.date: date,
-                Finance.desc: desc,
-                Finance.type: transaction_type
-            }).where(Finance.id == id)
-            query.execute()
+            with db.atomic():
+                MonthlyTagSummary.rebuild(months)
 
     def fetch_all_data(self):
         with db.connection_context():
-            return list(Finance.select().dicts())
+            return list(Finance.select(*TRANSACTION_FIELDS).dicts())
     
+    def fetch_page(self, filters=None, page_size=50, after=None, descending=False):
+        """One page of transactions ordered by (date, id), using keyset pagination.
+
+        `after` is the (date, id) of the last row of the previous page; rows strictly
+        after it (or before it when `descending`) are returned. `filters` may contain
+        tag, type, month ('YYYY-MM'), date, since and until (inclusive dates).
+        """
+        query = Finance.select(*TRANSACTION_FIELDS)
+        conditions = _filter_conditions(filters)
+        if conditions:
+            query = query.where(*conditions)
+        if after is not None:
+            after_date, after_id = after
+            if descending:
+                query = query.where((Finance.date < after_date) | ((Finance.date == after_date) & (Finance.id < after_id)))
+            else:
+                query = query.where((Finance.date > after_date) | ((Finance.date == after_date) & (Finance.id > after_id)))
+        if descending:
+            query = query.order_by(Finance.date.desc(), Finance.id.desc())
+        else:
+            query = query.order_by(Finance.date, Finance.id)
+        with db.connection_context():
+            return list(query.limit(page_size).dicts())
+
+    def iter_transactions(self, filters=None, page_size=500, after_id=None):
+        """Yield transactions page by page in (date, id) order, so memory stays
+        flat regardless of table size. Starts after the row `after_id` if given
+        (ValueError if there is no such row).
+        """
+        after = None
+        if after_id is not None:
+            with db.connection_context():
+                try:
+                    after = (Finance.get_by_id(after_id).date, after_id)
+                except Finance.DoesNotExist:
+                    raise ValueError(f"No transaction with ID {after_id}")
+        while True:
+            page = self.fetch_page(filters, page_size, after)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = (page[-1]['date'], page[-1]['id'])
+
     def fetch_data_by_id(self, id):
         with db.connection_context():
             return Finance.select().where(Finance.id == id).get()
 
     def fetch_by_date(self, date):
         with db.connection_context():
-            return list(Finance.select().where(Finance.date == date).dicts())
+            return list(Finance.select(*TRANSACTION_FIELDS).where(Finance.date == date).dicts())
 
     def fetch_by_month(self, month):
         with db.connection_context():
-            return list(Finance.select().where(
-                fn.strftime('%Y-%m', Finance.date) == month
-            ).dicts())
+            return list(Finance.select(*TRANSACTION_FIELDS).where(Finance.year_month == month).dicts())
 
     def fetch_by_tag(self, tag):
         with db.connection_context():
-            return list(Finance.select().where(Finance.tag == tag).dicts())
+            return list(Finance.select(*TRANSACTION_FIELDS).where(Finance.tag == tag).dicts())
 
     def fetch_total_income(self):
         with db.connection_context():
-            return Finance.select(fn.SUM(Finance.amount)).where(Finance.type == 'income').scalar() or 0
+            return MonthlyTagSummary.select(_rupees(fn.SUM(MonthlyTagSummary.total))).where(MonthlyTagSummary.type == 'income').scalar() or 0
 
     def fetch_total_expense(self):
         with db.connection_context():
-            return Finance.select(fn.SUM(Finance.amount)).where(Finance.type == 'expense').scalar() or 0
+            return MonthlyTagSummary.select(_rupees(fn.SUM(MonthlyTagSummary.total))).where(MonthlyTagSummary.type == 'expense').scalar() or 0
 
     def fetch_all_tags(self):
         with db.connection_context():
-            return [entry['tag'] for entry in Finance.select(Finance.tag).distinct().dicts()]
+            return [entry['tag'] for entry in MonthlyTagSummary.select(MonthlyTagSummary.tag).distinct().dicts()]
 
     def get_monthly_trend(self):
         with db.connection_context():
-            return list(Finance.select(
-                fn.strftime('%Y-%m', Finance.date).alias('month'),
-                fn.SUM(Case(None, [(Finance.type == 'income', Finance.amount)], 0)).alias('total_income'),
-                fn.SUM(Case(None, [(Finance.type == 'expense', Finance.amount)], 0)).alias('total_expense')
-            ).group_by(fn.strftime('%Y-%m', Finance.date)).order_by(fn.strftime('%Y-%m', Finance.date)).dicts())
+            return list(MonthlyTagSummary.select(
+                MonthlyTagSummary.year_month.alias('month'),
+                _sum_by_type('income').alias('total_income'),
+                _sum_by_type('expense').alias('total_expense')
+            ).group_by(MonthlyTagSummary.year_month).order_by(MonthlyTagSummary.year_month).dicts())
 
     def fetch_average_income_per_month(self):
         with db.connection_context():
             subquery = (
-                Finance
+                MonthlyTagSummary
                 .select(
-                    fn.strftime('%Y-%m', Finance.date).alias('month'),
-                    fn.SUM(Finance.amount).alias('monthly_income')
+                    MonthlyTagSummary.year_month.alias('month'),
+                    fn.SUM(MonthlyTagSummary.total).alias('monthly_income')
                 )
-                .where(Finance.type == 'income')
-                .group_by(fn.strftime('%Y-%m', Finance.date))
+                .where(MonthlyTagSummary.type == 'income')
+                .group_by(MonthlyTagSummary.year_month)
             ).alias('monthly_summary')
 
             query = (
-                Finance.select(fn.AVG(subquery.c.monthly_income))
+                MonthlyTagSummary.select(_rupees(fn.AVG(subquery.c.monthly_income)))
                 .from_(subquery)
             )
             average = query.scalar()
@@ -109,39 +299,47 @@ class DatabaseManager:
     def fetch_average_expense_per_month(self):
         with db.connection_context():
             subquery = (
-                Finance
+                MonthlyTagSummary
                 .select(
-                    fn.strftime('%Y-%m', Finance.date).alias('month'),
-                    fn.SUM(Finance.amount).alias('monthly_expense')
+                    MonthlyTagSummary.year_month.alias('month'),
+                    fn.SUM(MonthlyTagSummary.total).alias('monthly_expense')
                 )
-                .where(Finance.type == 'expense')
-                .group_by(fn.strftime('%Y-%m', Finance.date))
+                .where(MonthlyTagSummary.type == 'expense')
+                .group_by(MonthlyTagSummary.year_month)
             ).alias('monthly_summary')
 
             query = (
-                Finance.select(fn.AVG(subquery.c.monthly_expense))
+                MonthlyTagSummary.select(_rupees(fn.AVG(subquery.c.monthly_expense)))
                 .from_(subquery)
             )
             average = query.scalar()
             return average or 0
 
+    def fetch_totals_by_type_and_tag(self):
+        with db.connection_context():
+            return list(MonthlyTagSummary.select(
+                MonthlyTagSummary.type,
+                MonthlyTagSummary.tag,
+                _rupees(fn.SUM(MonthlyTagSummary.total)).alias('amount')
+            ).group_by(MonthlyTagSummary.type, MonthlyTagSummary.tag).dicts())
+
     def fetch_top_tags_by_expense(self, limit=5):
         with db.connection_context():
-            return list(Finance.select(
-                Finance.tag,
-                fn.SUM(Finance.amount).alias('total')
-            ).where(Finance.type == 'expense')
-            .group_by(Finance.tag)
-            .order_by(fn.SUM(Finance.amount).desc())
+            return list(MonthlyTagSummary.select(
+                MonthlyTagSummary.tag,
+                _rupees(fn.SUM(MonthlyTagSummary.total)).alias('total')
+            ).where(MonthlyTagSummary.type == 'expense')
+            .group_by(MonthlyTagSummary.tag)
+            .order_by(fn.SUM(MonthlyTagSummary.total).desc())
             .limit(limit).dicts())
 
     def fetch_last_n_months_trend(self, n=3):
         with db.connection_context():
-            month_expr = fn.strftime('%Y-%m', Finance.date)
-            return list(Finance.select(
+            month_expr = MonthlyTagSummary.year_month
+            return list(MonthlyTagSummary.select(
                 month_expr.alias('month'),
-                fn.SUM(Case(None, [(Finance.type == 'income', Finance.amount)], 0)).alias('income'),
-                fn.SUM(Case(None, [(Finance.type == 'expense', Finance.amount)], 0)).alias('expense')
+                _sum_by_type('income').alias('income'),
+                _sum_by_type('expense').alias('expense')
             )
             .group_by(month_expr)
             .order_by(month_expr.desc())
@@ -150,14 +348,105 @@ class DatabaseManager:
 
     def fetch_large_expenses(self, threshold=10000):
         with db.connection_context():
-            return list(Finance.select().where(
+            return list(Finance.select(*TRANSACTION_FIELDS).where(
                 (Finance.type == 'expense') &
                 (Finance.amount >= threshold)
             ).dicts())
 
+    def load_tag_cache(self, fingerprint, limit=10000):
+        """Most recently saved narration -> tag entries for a classifier, oldest first."""
+        with db.connection_context():
+            rows = (TagCacheEntry
+                    .select(TagCacheEntry.narration, TagCacheEntry.tag)
+                    .where(TagCacheEntry.fingerprint == fingerprint)
+                    .order_by(TagCacheEntry.id.desc())
+                    .limit(limit)
+                    .tuples())
+            return dict(reversed(list(rows)))
+
+    def save_tag_cache(self, fingerprint, entries, limit=10000):
+        """Store narration -> tag entries for a classifier. Entries of any other
+        fingerprint are stale (the keyword map or model changed) and are dropped,
+        as is everything but the `limit` most recently saved entries."""
+        with db.connection_context():
+            with db.atomic():
+                db.cursor().executemany(
+                    f'INSERT OR REPLACE INTO "{TagCacheEntry._meta.table_name}" ("fingerprint", "narration", "tag") VALUES (?, ?, ?)',
+                    [(fingerprint, narration, tag) for narration, tag in entries.items()]
+                )
+                TagCacheEntry.delete().where(TagCacheEntry.fingerprint != fingerprint).execute()
+                newest = (TagCacheEntry
+                          .select(TagCacheEntry.id)
+                          .where(TagCacheEntry.fingerprint == fingerprint)
+                          .order_by(TagCacheEntry.id.desc())
+                          .limit(limit))
+                TagCacheEntry.delete().where(
+                    (TagCacheEntry.fingerprint == fingerprint) & TagCacheEntry.id.not_in(newest)
+                ).execute()
+
+    def fetch_snapshot(self, top_n=5, trend_months=3, large_threshold=10000, large_limit=None):
+        """Every headline figure in two queries: one pass over the monthly/tag
+        rollup for totals, averages, top tags and trend, and one indexed lookup
+        for the large expenses. With `large_limit`, only that many of the largest
+        expenses are fetched (plus a count of all of them).
+        """
+        with db.connection_context():
+            rollup = MonthlyTagSummary.select(
+                MonthlyTagSummary.year_month,
+                MonthlyTagSummary.tag,
+                MonthlyTagSummary.type,
+                MonthlyTagSummary.total.cast('INTEGER')  # raw paise: summed exactly, converted once
+            ).tuples()
+
+            totals = {'income': 0, 'expense': 0}
+            months = {}
+            expense_by_tag = {}
+            for year_month, tag, transaction_type, total in rollup:
+                totals[transaction_type] += total
+                month = months.setdefault(year_month, {'income': 0, 'expense': 0})
+                month[transaction_type] += total
+                if transaction_type == 'expense':
+                    expense_by_tag[tag] = expense_by_tag.get(tag, 0) + total
+
+            is_large = (Finance.type == 'expense') & (Finance.amount >= large_threshold)
+            large_query = Finance.select(*TRANSACTION_FIELDS).where(is_large)
+            if large_limit is None:
+                large_expenses = list(large_query.dicts())
+                large_expense_count = len(large_expenses)
+            else:
+                # Walks the (type, amount) index from the top, so the cost doesn't grow with the ledger.
+                large_expenses = list(large_query.order_by(
+                    Finance.amount.desc(), Finance.date.desc(), Finance.id.desc()
+                ).limit(large_limit).dicts())
+                large_expense_count = Finance.select().where(is_large).count()
+
+        def monthly_average(transaction_type):
+            # Only months that actually have rows of this type count, matching
+            # fetch_average_*_per_month.
+            values = [month[transaction_type] for month in months.values() if month[transaction_type]]
+            return sum(values) / len(values) / 100 if values else 0
+
+        top_tags = sorted(expense_by_tag.items(), key=lambda item: item[1], reverse=True)[:top_n]
+        recent_months = sorted(months, reverse=True)[:trend_months]
+        return FinancialSnapshot(
+            total_income=totals['income'] / 100,
+            total_expense=totals['expense'] / 100,
+            average_monthly_income=monthly_average('income'),
+            average_monthly_expense=monthly_average('expense'),
+            top_expense_tags=[{'tag': tag, 'total': total / 100} for tag, total in top_tags],
+            monthly_trend=[
+                {'month': month, 'income': months[month]['income'] / 100, 'expense': months[month]['expense'] / 100}
+                for month in recent_months
+            ],
+            large_expenses=large_expenses,
+            large_expense_count=large_expense_count
+        )
+
 if __name__ == "__main__":
+    from .migrations import apply_migrations
+
     db.connect()
-    db.create_tables([Finance], safe=True)
+    apply_migrations(db)
     print("Database and tables created successfully.")
     
     manager = DatabaseManager()
@@ -0,0 +1,129 @@
+from peewee import CharField, IntegerField, fn
+from playhouse.migrate import SqliteMigrator, migrate
+
+from .models import Finance, MonthlyTagSummary, TagCacheEntry, ImportLog, compute_row_hash
+
+# Every model owned by the application, created once all migrations have run.
+MODELS = [Finance, MonthlyTagSummary, TagCacheEntry, ImportLog]
+
+
+def add_row_hash(database):
+    """One-time backfill for databases created before `Finance.row_hash` existed.
+
+    Adds the column and fills it for every row, so the UNIQUE index created by
+    `create_tables` can be built. Older versions told rows apart by their tag
+    too, so rows may share a hash while differing only in tag (or be exact
+    copies). Those are kept: the first row gets the plain hash, which is what
+    duplicate detection matches on, and later ones get it suffixed with their id.
+    """
+    table = Finance._meta.table_name
+    if not database.table_exists(table):
+        return
+    if 'row_hash' in {column.name for column in database.get_columns(table)}:
+        return
+
+    migrator = SqliteMigrator(database)
+    migrate(migrator.add_column(table, 'row_hash', CharField(null=True)))
+
+    seen = set()
+    updates = []
+    # Raw column values: at this schema version amounts are still REAL rupees,
+    # which the current model's PaiseField would misread as paise.
+    rows = database.execute_sql(f'SELECT "id", "amount", "date", "desc", "type" FROM "{table}" ORDER BY "id"')
+    for id, amount, date, desc, transaction_type in rows:
+        row_hash = compute_row_hash(amount, date, desc, transaction_type)
+        if row_hash in seen:
+            row_hash = f"{row_hash}:{id}"
+        else:
+            seen.add(row_hash)
+        updates.append((row_hash, id))
+
+    database.cursor().executemany(f'UPDATE "{table}" SET "row_hash" = ? WHERE "id" = ?', updates)
+
+
+def add_finance_indexes(database):
+    """Secondary indexes for the date, tag, type and amount filters."""
+    if not database.table_exists(Finance._meta.table_name):
+        return
+    for fields in [
+        (Finance.date,),
+        (Finance.type, Finance.date),
+        (Finance.tag, Finance.type),
+        (Finance.type, Finance.amount),
+    ]:
+        database.execute(Finance.index(*fields).safe())
+
+
+def add_year_month(database):
+    """Stored, indexed 'YYYY-MM' column backfilled from `date`."""
+    table = Finance._meta.table_name
+    if not database.table_exists(table):
+        return
+    if 'year_month' not in {column.name for column in database.get_columns(table)}:
+        migrator = SqliteMigrator(database)
+        migrate(migrator.add_column(table, 'year_month', CharField(max_length=7, null=True)))
+        Finance.update(year_month=fn.substr(Finance.date, 1, 7)).execute()
+    for fields in [(Finance.year_month,), (Finance.type, Finance.year_month)]:
+        database.execute(Finance.index(*fields).safe())
+
+
+def add_monthly_tag_summary(database):
+    """Create the monthly/tag rollup and fill it from the existing rows."""
+    if not database.table_exists(Finance._meta.table_name):
+        return
+    database.create_tables([MonthlyTagSummary])
+    MonthlyTagSummary.rebuild()
+
+
+def add_tag_cache(database):
+    """Sidecar table for the persisted classification cache."""
+    database.create_tables([TagCacheEntry])
+
+
+def add_import_log(database):
+    """Record of imported statement files, for checksum skips and watermarks."""
+    database.create_tables([ImportLog])
+
+
+def store_amounts_in_paise(database):
+    """Money columns from REAL rupees to INTEGER paise (see PaiseField)."""
+    table = Finance._meta.table_name
+    if not database.table_exists(table):
+        return
+    migrator = SqliteMigrator(database)
+    migrate(migrator.alter_column_type(table, 'amount', IntegerField()))
+    database.execute_sql(f'UPDATE "{table}" SET "amount" = CAST(ROUND("amount" * 100) AS INTEGER)')
+    # The rollup is derived data: recreate it with the new column type.
+    database.drop_tables([MonthlyTagSummary])
+    database.create_tables([MonthlyTagSummary])
+    MonthlyTagSummary.rebuild()
+
+
+# Ordered list of schema migrations; the position (1-based) is the version number
+# stored in SQLite's `user_version` pragma. Only ever append to this list.
+MIGRATIONS = [
+    add_row_hash,
+    add_finance_indexes,
+    add_year_month,
+    add_monthly_tag_summary,
+    add_tag_cache,
+    add_import_log,
+    store_amounts_in_paise,
+]
+
+
+def apply_migrations(database):
+    """Bring `database` up to the latest schema version.
+
+    Migrations newer than the stored `user_version` are applied in order, each in
+    its own transaction. On a fresh database they are no-ops and `create_tables`
+    builds the current schema directly.
+    """
+    version = database.user_version
+    for number, migration in enumerate(MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        with database.atomic():
+            migration(database)
+            database.user_version = number
+    database.create_tables(MODELS)
@@ -1,26 +1,178 @@
-from ..config import DB_PATH
+import datetime
+import hashlib
+
+from ..config import DB_PATH, SQLITE_PRAGMAS, DB_MAX_CONNECTIONS, DB_STALE_TIMEOUT
+from playhouse.pool import PooledSqliteDatabase
 from peewee import (
-    SqliteDatabase,
     Model,
     CharField,
-    FloatField,
     DateField,
     TextField,
-    Check
+    IntegerField,
+    DateTimeField,
+    Check,
+    fn
 )
 
 # 📦 Database setup (change the path if needed)
-db = SqliteDatabase(DB_PATH)  # or use full path: "src/db/finance.db"
+# `connection_context()` hands connections back to the pool rather than closing
+# them, so pragmas and SQLite's page cache survive between queries.
+db = PooledSqliteDatabase(
+    DB_PATH,  # or use full path: "src/db/finance.db"
+    pragmas=SQLITE_PRAGMAS,
+    max_connections=DB_MAX_CONNECTIONS,
+    stale_timeout=DB_STALE_TIMEOUT,
+    check_same_thread=False,  # pooled connections may be reused by another thread (Streamlit)
+)
 
 # 📄 BaseModel to link with the database
 class BaseModel(Model):
     class Meta:
         database = db
 
+def to_paise(rupees):
+    """Rupee amount (float, str or Decimal) -> integer paise."""
+    return round(float(rupees) * 100)
+
+# 💰 Money column: stored as integer paise so sums in SQL are exact, read and
+# written as rupees so callers never see paise.
+class PaiseField(IntegerField):
+    def db_value(self, value):
+        return None if value is None else to_paise(value)
+
+    def python_value(self, value):
+        return None if value is None else value / 100
+
+def compute_row_hash(amount, date, desc, transaction_type):
+    """Content hash identifying a transaction for duplicate detection.
+
+    The tag is left out on purpose so that re-tagging a row does not let the
+    same statement line be imported a second time.
+    """
+    canonical = f"{date}|{float(amount):.2f}|{desc.strip()}|{transaction_type}"
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+def year_month_of(date):
+    """'YYYY-MM' bucket of a date or 'YYYY-MM-DD' string."""
+    return str(date)[:7]
+
+def row_values(tag, amount, date, desc, transaction_type):
+    """Column values for a Finance row, including the derived columns."""
+    return {
+        'tag': tag,
+        'amount': amount,
+        'date': date,
+        'desc': desc,
+        'type': transaction_type,
+        'year_month': year_month_of(date),
+        'row_hash': compute_row_hash(amount, date, desc, transaction_type)
+    }
+
 # 💰 Finance model
 class Finance(BaseModel):
     tag = CharField()
-    amount = FloatField()
+    amount = PaiseField()
     date = DateField()
     desc = TextField()
     type = CharField(constraints=[Check("type IN ('income', 'expense')")])
+    # Stored 'YYYY-MM' so month filters and groupings can use an index
+    # instead of evaluating strftime() on every row.
+    year_month = CharField(max_length=7)
+    row_hash = CharField(unique=True)
+
+    class Meta:
+        # Cover the filters used by DatabaseManager's lookups and aggregates.
+        indexes = (
+            (('date',), False),
+            (('year_month',), False),
+            (('type', 'year_month'), False),
+            (('type', 'date'), False),
+            (('tag', 'type'), False),
+            (('type', 'amount'), False),
+        )
+
+
+# 📊 Rollup of Finance per (month, tag, type), kept current by DatabaseManager
+# so summaries scale with the number of months rather than transactions.
+class MonthlyTagSummary(BaseModel):
+    year_month = CharField(max_length=7)
+    tag = CharField()
+    type = CharField()
+    total = PaiseField(default=0)
+    count = IntegerField(default=0)
+
+    class Meta:
+        table_name = 'monthly_tag_summary'
+        indexes = (
+            (('year_month', 'tag', 'type'), True),
+        )
+
+    @classmethod
+    def apply(cls, deltas):
+        """Add {(year_month, tag, type): (paise, count)} deltas to the rollup.
+
+        Negative deltas are used for deletes; groups whose count drops to zero
+        are removed.
+        """
+        if not deltas:
+            return
+        rows = [
+            (year_month, tag, transaction_type, total, count)
+            for (year_month, tag, transaction_type), (total, count) in deltas.items()
+        ]
+        cls._meta.database.cursor().executemany(
+            f'INSERT INTO "{cls._meta.table_name}" ("year_month", "tag", "type", "total", "count") '
+            'VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT ("year_month", "tag", "type") DO UPDATE SET '
+            '"total" = "total" + excluded."total", "count" = "count" + excluded."count"',
+            rows
+        )
+        cls.delete().where(cls.count <= 0).execute()
+
+    @classmethod
+    def rebuild(cls, months=None):
+        """Recompute the rollup from Finance, for all months or only `months`."""
+        delete = cls.delete()
+        source = Finance.select(
+            Finance.year_month, Finance.tag, Finance.type,
+            fn.SUM(Finance.amount), fn.COUNT(Finance.id)
+        )
+        if months is not None:
+            months = list(months)
+            delete = delete.where(cls.year_month.in_(months))
+            source = source.where(Finance.year_month.in_(months))
+        delete.execute()
+        cls.insert_from(
+            source.group_by(Finance.year_month, Finance.tag, Finance.type),
+            [cls.year_month, cls.tag, cls.type, cls.total, cls.count]
+        ).execute()
+
+
+# 🏷️ Persisted classification cache: normalized narration -> tag, per classifier
+# fingerprint, so repeat imports skip the matcher for narrations already seen.
+class TagCacheEntry(BaseModel):
+    fingerprint = CharField()
+    narration = TextField()
+    tag = CharField()
+
+    class Meta:
+        table_name = 'tag_cache'
+        indexes = (
+            (('fingerprint', 'narration'), True),
+        )
+
+
+# 📜 One row per imported statement file. The checksum lets an identical file be
+# skipped outright, and the latest `max_date` per account is the watermark that
+# later, overlapping statements fast-forward past.
+class ImportLog(BaseModel):
+    checksum = CharField(unique=True)
+    account = CharField(null=True, index=True)
+    bank = CharField()
+    file = TextField()
+    max_date = DateField(null=True)
+    rows = IntegerField()
+    imported_at = DateTimeField(default=datetime.datetime.now)
+
+    class Meta:
+        table_name = 'import_log'
@@ -0,0 +1,29 @@
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List
+
+
+@dataclass
+class FinancialSnapshot:
+    """All headline figures of the ledger, computed together by `DatabaseManager.fetch_snapshot`."""
+    total_income: float = 0
+    total_expense: float = 0
+    average_monthly_income: float = 0
+    average_monthly_expense: float = 0
+    # [{'tag': str, 'total': float}], largest first
+    top_expense_tags: List[Dict] = field(default_factory=list)
+    # [{'month': 'YYYY-MM', 'income': float, 'expense': float}], most recent first
+    monthly_trend: List[Dict] = field(default_factory=list)
+    # Finance rows (as dicts) of expenses at or above the threshold
+    large_expenses: List[Dict] = field(default_factory=list)
+    # All expenses at or above the threshold, when large_expenses is only the largest few
+    large_expense_count: int = 0
+
+    @property
+    def savings(self) -> float:
+        # Both totals are whole paise; rounding drops the float subtraction noise.
+        return round(self.total_income - self.total_expense, 2)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data['savings'] = self.savings
+        return data
@@ -0,0 +1,109 @@
+import csv
+import gzip
+import json
+
+# Columns written by every format, in order.
+FIELDS = ["id", "tag", "amount", "date", "desc", "type"]
+
+
+class Exporter:
+    """Write transactions to a file chunk by chunk, so exports run in constant memory.
+
+    Formats: csv and jsonl (optionally gzip-compressed), and the columnar
+    parquet and arrow (Arrow IPC / Feather v2) formats, which are written as
+    one record batch per chunk and need pyarrow.
+    """
+    FORMATS = ("csv", "jsonl", "parquet", "arrow")
+
+    def __init__(self, path, fmt="csv", compress=False, chunk_size=5000):
+        fmt = fmt.lower()
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}'. Use one of: {', '.join(self.FORMATS)}")
+        self.path = path
+        self.fmt = fmt
+        self.compress = compress
+        self.chunk_size = chunk_size
+
+    def export(self, rows):
+        """Consume an iterable of transaction dicts; returns the number of rows written."""
+        writer = getattr(self, f"_write_{self.fmt}")
+        return writer(rows)
+
+    def _open_text(self):
+        if self.compress:
+            return gzip.open(self.path, "wt", newline="", encoding="utf-8")
+        return open(self.path, "w", newline="", encoding="utf-8")
+
+    def _write_csv(self, rows):
+        count = 0
+        with self._open_text() as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        return count
+
+    def _write_jsonl(self, rows):
+        count = 0
+        with self._open_text() as f:
+            for row in rows:
+                f.write(json.dumps({field: row[field] for field in FIELDS}, default=str))
+                f.write("\n")
+                count += 1
+        return count
+
+    def _batches(self, rows):
+        """Yield pyarrow RecordBatches of at most `chunk_size` rows."""
+        pa = _pyarrow()
+        schema = self._schema()
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.chunk_size:
+                yield pa.RecordBatch.from_pylist(batch, schema=schema)
+                batch = []
+        if batch:
+            yield pa.RecordBatch.from_pylist(batch, schema=schema)
+
+    def _schema(self):
+        pa = _pyarrow()
+        return pa.schema([
+            ("id", pa.int64()),
+            ("tag", pa.string()),
+            ("amount", pa.float64()),
+            ("date", pa.date32()),
+            ("desc", pa.string()),
+            ("type", pa.string()),
+        ])
+
+    def _write_parquet(self, rows):
+        import pyarrow.parquet as pq
+
+        count = 0
+        compression = "gzip" if self.compress else "snappy"
+        with pq.ParquetWriter(self.path, self._schema(), compression=compression) as writer:
+            for batch in self._batches(rows):
+                writer.write_batch(batch)
+                count += batch.num_rows
+        return count
+
+    def _write_arrow(self, rows):
+        pa = _pyarrow()
+        # Arrow IPC only supports lz4/zstd buffer compression, so --gzip maps to zstd here.
+        options = pa.ipc.IpcWriteOptions(compression="zstd" if self.compress else None)
+        count = 0
+        with pa.ipc.new_file(self.path, self._schema(), options=options) as writer:
+            for batch in self._batches(rows):
+                writer.write_batch(batch)
+                count += batch.num_rows
+        return count
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError as e:
+        raise ImportError("The parquet and arrow export formats require pyarrow (pip install pyarrow).") from e
+    return pyarrow
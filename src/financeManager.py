@@ -1,7 +1,16 @@
 from .database.databaseManager import DatabaseManager
-from .database.models import db, Finance
+from .database.models import db
+from .database import migrations
+from itertools import batched
+import os
 
-from .importer import Importer
+from .importer import parse_statements, file_checksum, iter_chunks
+from .Classifiers.cache import CachedClassifier
+from .Classifiers.fallback import FallbackClassifier
+from .Classifiers.rule_based import RuleBasedTagClassifier
+from .Classifiers.model_files import model_exists
+from .exporter import Exporter
+from .config import TAG_MODEL_DIR
 
 
 
@@ -9,30 +18,189 @@ class FinanceManager:
     def __init__(self):
         if db.is_closed():
             db.connect()
-        db.create_tables([Finance])
+        migrations.apply_migrations(db)
         self.dbmanager = DatabaseManager()
+        self._classifier = None
+
+    @property
+    def classifier(self):
+        """Rule-based classifier behind an LRU cache persisted in the database.
+        Once a tag model has been trained (see train_classifier) it tags the
+        narrations the rules leave as "unknown"."""
+        if self._classifier is None:
+            classifier = RuleBasedTagClassifier()
+            if model_exists(TAG_MODEL_DIR):
+                from .Classifiers.statistical import NaiveBayesTagClassifier
+                classifier = FallbackClassifier(classifier, NaiveBayesTagClassifier.load(TAG_MODEL_DIR))
+            self._classifier = CachedClassifier(classifier, store=self.dbmanager)
+        return self._classifier
+
+    def train_classifier(self, path=TAG_MODEL_DIR, **options):
+        """Train the statistical tag model on every transaction that already has a
+        tag other than "unknown" and save it to `path`.
+        Returns a dict with the number of `rows` and `tags` it learned from."""
+        from .Classifiers.statistical import NaiveBayesTagClassifier
+
+        descriptions, tags = [], []
+        for row in self.iter_transactions(page_size=5000):
+            if row["tag"] != "unknown":
+                descriptions.append(row["desc"])
+                tags.append(row["tag"])
+        if len(set(tags)) < 2:
+            raise ValueError("Need tagged transactions from at least two tags to train a classifier.")
+        model = NaiveBayesTagClassifier.train(descriptions, tags, **options)
+        model.save(path)
+        self._classifier = None
+        return {"rows": len(tags), "tags": len(model.tags)}
         
-    def extract_bank_statement_to_db(self,file,bankname):
-        self.importer = Importer(file,bankname)
-        for amount,date,desc,tag,type in self.importer.entries:
-            self.add_data(tag,amount,date,desc,type)
+    def extract_bank_statement_to_db(self,file,bankname=None,account=None):
+        """Import a bank statement in one bulk transaction. The bank is detected
+        from the file when `bankname` is not given.
+        Returns a dict with the number of `inserted` and `skipped` (duplicate) rows.
+        """
+        result = next(self.import_statements([file], bankname, workers=1, account=account))
+        if "error" in result:
+            raise ValueError(result["error"])
+        return result
+
+    def import_statements(self, paths, bankname=None, workers=None, account=None):
+        """Import several statements, parsing and tagging them in parallel worker
+        processes while this process writes each file's rows through the bulk path.
+
+        Files whose checksum is in the import log are skipped without parsing, and
+        in a statement that continues its account's last import (starts on/before
+        the latest imported date and runs past it), the rows before that date are
+        dropped before any DB work. `account` overrides the account number in the
+        statements, and without a `bankname` each file's bank is detected from its
+        header. A single file (or `workers=1`) is streamed straight into the DB.
+        Yields a dict per file, in order: its `file` and `inserted`/`skipped`
+        counts (plus `already_imported` or `fast_forwarded`), or the `error`
+        that stopped it.
+        """
+        checksums = {path: file_checksum(path) for path in paths if os.path.isfile(path)}
+        imported = self.dbmanager.fetch_imported(set(checksums.values()))
+        to_parse, seen = [], set()
+        for path in paths:
+            checksum = checksums.get(path)
+            if checksum is not None and (checksum in imported or checksum in seen):
+                continue
+            seen.add(checksum)
+            to_parse.append(path)
+        skip = set(paths) - set(to_parse)
+        parsed_files = parse_statements(to_parse, bankname, self.classifier, workers, account,
+                                        self.dbmanager.fetch_import_watermarks())
+        try:
+            for path in paths:
+                checksum = checksums.get(path)
+                if path in skip:
+                    yield {"file": path, "inserted": 0, "skipped": imported.get(checksum, 0), "already_imported": True}
+                    continue
+                parsed = next(parsed_files)
+                if "error" in parsed:
+                    yield parsed
+                    continue
+                self.classifier.merge(parsed.get("cache", {}), parsed.get("hits", 0), parsed.get("misses", 0))
+                importer = parsed.get("importer")
+                # In-process the rows are parsed while they are inserted, so the
+                # stats are only known once the insert has read them all.
+                rows = importer.entries if importer else iter_chunks(parsed["chunks"])
+                stats = (lambda: importer.stats) if importer else (lambda: parsed)
+                import_log = lambda: self._import_log(checksum, path, stats())
+                try:
+                    result = self._insert_entries(rows, import_log=import_log)
+                except (OSError, ValueError, NotImplementedError) as e:
+                    yield {"file": path, "error": str(e)}
+                    continue
+                fast_forwarded = stats()["fast_forwarded"]
+                result["skipped"] += fast_forwarded
+                yield {"file": path, **result, "fast_forwarded": fast_forwarded}
+        finally:
+            parsed_files.close()
+            self.classifier.save()
+
+    @staticmethod
+    def _import_log(checksum, path, stats):
+        """ImportLog values for an imported statement; None when every row was
+        fast-forwarded, as then nothing of it was stored and its checksum mustn't
+        block a later import."""
+        if stats["fast_forwarded"] and stats["fast_forwarded"] == stats["rows"]:
+            return None
+        return {
+            "checksum": checksum,
+            "account": stats["account"],
+            "bank": stats["bank"],
+            "file": os.path.basename(path),
+            "max_date": stats["max_date"],
+            "rows": stats["rows"],
+        }
+
+    def _insert_entries(self, entries, import_log=None):
+        rows = (
+            (tag,amount,date,desc,self._transaction_type(type))
+            for amount,date,desc,tag,type in entries
+        )
+        return self.dbmanager.bulk_insert_entries(rows, import_log=import_log)
+
+    def reclassify(self, since=None, dry_run=False, batch_size=5000, overwrite_unknown=False):
+        """Re-tag existing transactions (all, or those dated on/after `since`) with
+        the current classifier, e.g. after editing CATEGORY_KEYWORDS.
+
+        Rows the classifier can't tag keep their current tag (which may have
+        been set by hand), unless `overwrite_unknown` is set.
+        Rows are streamed and classified a batch at a time; each batch's changes
+        are written in one transaction. With `dry_run` nothing is written.
+        Returns a dict with the number of rows `scanned`, `changed` and `kept`
+        (left alone for lack of a better tag), and the `changes` themselves
+        (id, desc, old_tag, new_tag) on a dry run.
+        """
+        scanned = changed = kept = 0
+        changes = []
+        rows = self.dbmanager.iter_tag_rows(since, page_size=batch_size)
+        for batch in batched(rows, batch_size):
+            tags = self.classifier.classify_batch([row['desc'] for row in batch])
+            retagged = [(row, tag) for row, tag in zip(batch, tags) if tag != row['tag']]
+            if not overwrite_unknown:
+                known = [(row, tag) for row, tag in retagged if tag != "unknown"]
+                kept += len(retagged) - len(known)
+                retagged = known
+            scanned += len(batch)
+            changed += len(retagged)
+            if dry_run:
+                changes.extend(
+                    {'id': row['id'], 'desc': row['desc'], 'old_tag': row['tag'], 'new_tag': tag}
+                    for row, tag in retagged
+                )
+            else:
+                self.dbmanager.retag(retagged)
+        self.classifier.save()
+        result = {'scanned': scanned, 'changed': changed, 'kept': kept}
+        if dry_run:
+            result['changes'] = changes
+        return result
+
+    @staticmethod
+    def _transaction_type(isIncome):
+        if isinstance(isIncome, str) and isIncome in ["income", "expense"]:
+            return isIncome
+        return "income" if isIncome else "expense"
+
+    def export_data(self,path,fmt="csv",compress=False,chunk_size=5000):
+        """Stream every transaction to `path` in csv, jsonl, parquet or arrow format.
+        Returns the number of rows written."""
+        exporter = Exporter(path,fmt,compress,chunk_size)
+        return exporter.export(self.iter_transactions(page_size=chunk_size))
 
     def add_data(self,tag,amount,date,desc,isIncome):
         """Add Data to the database"
         Args are: tag: str, amount: float, date: str (YYYY-MM-DD), desc: str, isIncome: str
         """
-        if isinstance(isIncome, str) and isIncome in ["income", "expense"]:
-            type = isIncome
-        else:
-            type = "income" if isIncome else "expense"
+        type = self._transaction_type(isIncome)
         self.dbmanager.insert_data(tag,amount,date,desc,type)
     
     def update_data(self,id,tag,amount,date,desc,isIncome):
-        """Type could only be income or expense"""
-        if isinstance(isIncome, str) and isIncome in ["income", "expense"]:
-            type = isIncome
-        else:
-            type = "income" if isIncome else "expense"
+        """Type could only be income or expense.
+        Raises ValueError if the edited row would duplicate an existing transaction."""
+        type = self._transaction_type(isIncome)
         self.dbmanager.update_by_id(id,tag,amount,date,desc,type)
     
     def get_data_by_id(self,id):
@@ -48,6 +216,21 @@ class FinanceManager:
         data = self.dbmanager.fetch_all_data()
         return data
 
+    def iter_transactions(self, filters=None, page_size=500, after_id=None):
+        """Stream transactions in (date, id) order without loading the whole table.
+        filters: optional dict of tag, type, month, date, since, until."""
+        return self.dbmanager.iter_transactions(filters, page_size, after_id)
+
+    def get_page(self, filters=None, page_size=50, after=None, descending=False):
+        """One keyset page; pass the (date, id) of the previous page's last row as `after`."""
+        return self.dbmanager.fetch_page(filters, page_size, after, descending)
+
+    def get_monthly_trend(self):
+        return self.dbmanager.get_monthly_trend()
+
+    def get_totals_by_type_and_tag(self):
+        return self.dbmanager.fetch_totals_by_type_and_tag()
+
     def get_all_tags(self):
         data = self.dbmanager.fetch_all_tags()
         return data
@@ -91,6 +274,12 @@ class FinanceManager:
     def get_large_expenses(self, threshold=10000):
         return self.dbmanager.fetch_large_expenses(threshold)
 
+    def get_snapshot(self, top_n=5, trend_months=3, large_threshold=10000, large_limit=None):
+        """All summary figures at once as a FinancialSnapshot, instead of calling
+        the individual getters (each of which runs its own query). `large_limit`
+        keeps only the largest few large expenses."""
+        return self.dbmanager.fetch_snapshot(top_n, trend_months, large_threshold, large_limit)
+
 
     
     
@@ -1,27 +1,215 @@
-from .Banks.pnb import PNB
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import batched
+from pathlib import Path
+import glob
+import hashlib
+import os
+
+from .Banks.registry import detect_bank, get_parser
 from .Classifiers.rule_based import RuleBasedTagClassifier
 
+STATEMENT_EXTENSIONS = (".csv",)
+
 class Importer:
-    def __init__(self,filepath,bank_name):
+    max_pending = 10000  # rows held back while deciding whether to fast-forward (see _fast_forward)
+
+    def __init__(self,filepath,bank_name=None,batch_size=1000,classifier=None,account=None,watermarks=None):
+        """bank_name: detected from the file's header when not given.
+        account: overrides the account number found in the statement header.
+        watermarks: {account: 'YYYY-MM-DD'}; when the statement overlaps its
+        account's watermark, the rows dated before it were covered by an earlier
+        import and are dropped before tagging."""
         self.file_path = filepath
-        self.bank_name = bank_name
+        self.bank_name = (bank_name or detect_bank(filepath)).lower()
+        self.batch_size = batch_size
         self.__bank_class = self.__resolver()
-        self.classifier =  RuleBasedTagClassifier()
+        self.classifier =  classifier or RuleBasedTagClassifier()
+        self._account = account
+        self.watermarks = watermarks or {}
+        self.max_date = None      # latest transaction date in the statement
+        self.rows = 0             # statement rows read so far
+        self.fast_forwarded = 0   # rows dropped for being older than the watermark
     
     def __resolver(self):
-        if self.bank_name.lower() == "pnb":
-            return PNB(self.file_path)
-        else:
-            raise NotImplementedError("Other Banks aren't supported till now.")
+        return get_parser(self.bank_name)(self.file_path)
     
+    @property
+    def account(self):
+        """The given account, else the statement's own (known once parsing has started)."""
+        return self._account or self.__bank_class.account
+
+    def _date_range(self):
+        """(earliest, latest) transaction date, from a separate pass over the file."""
+        earliest = latest = None
+        for entry in get_parser(self.bank_name)(self.file_path).entries:
+            if earliest is None or entry[1] < earliest:
+                earliest = entry[1]
+            if latest is None or entry[1] > latest:
+                latest = entry[1]
+        return earliest, latest
+
+    def _overlaps(self, watermark):
+        """Whether the statement starts on/before `watermark` and runs past it, i.e.
+        continues the last import. Statements entirely before or after it are
+        imported whole and left to row-hash dedup: older rows there may never
+        have been imported."""
+        earliest, latest = self._date_range()
+        return earliest is not None and earliest <= watermark < latest
+
+    def _older_dropped(self, entries, watermark):
+        for entry in entries:
+            if entry[1] < watermark:
+                self.fast_forwarded += 1
+                continue
+            yield entry
+
+    def _fast_forward(self, entries):
+        """Drop the rows before the watermark if the statement overlaps it (see
+        _overlaps), deciding in the same pass: rows older than the watermark are
+        held back until a row past it proves the overlap, or the statement ends
+        without one. Only if more than `max_pending` rows pile up is the file
+        scanned separately to decide."""
+        watermark = None
+        overlaps = None  # unknown until rows on both sides of the watermark are seen
+        before = after = False
+        pending = []     # rows held back (in order) while it's unknown
+        for entry in entries:  # [amount, date, desc, type]
+            if watermark is None:
+                watermark = self.watermarks.get(self.account, "")
+                if not watermark:
+                    overlaps = False
+            self.rows += 1
+            if self.max_date is None or entry[1] > self.max_date:
+                self.max_date = entry[1]
+            if overlaps is None:
+                before = before or entry[1] <= watermark
+                after = after or entry[1] > watermark
+                if before and after:
+                    overlaps = True
+                elif pending or entry[1] < watermark:
+                    pending.append(entry)
+                    if len(pending) < self.max_pending:
+                        continue
+                    overlaps = self._overlaps(watermark)
+                    entry = None
+                else:
+                    yield entry
+                    continue
+                yield from self._older_dropped(pending, watermark if overlaps else "")
+                pending = []
+                if entry is None:
+                    continue
+            if overlaps and entry[1] < watermark:
+                self.fast_forwarded += 1
+                continue
+            yield entry
+        yield from pending  # never shown to overlap: imported whole
+
+    @property
+    def stats(self):
+        """What the import log needs once `entries` has been consumed."""
+        return {
+            "bank": self.bank_name,
+            "account": self.account,
+            "max_date": self.max_date,
+            "rows": self.rows,
+            "fast_forwarded": self.fast_forwarded,
+        }
+
     @property
     def entries(self):
-        """returns in amount date desc tag type"""
-        raw_entries = self.__bank_class.entries  # [date, amount, desc]
-        tagged_entries = []
-        for entry in raw_entries:
-            tag = self.classifier.classify(entry[2])  # entry[2] = description
-            tagged_entries.append([entry[0], entry[1], entry[2], tag, entry[3]])
-        return tagged_entries
+        """yields in amount date desc tag type, lazily as the statement is parsed;
+        descriptions are tagged `batch_size` rows at a time"""
+        for batch in batched(self._fast_forward(self.__bank_class.entries), self.batch_size):  # [amount, date, desc, type]
+            tags = self.classifier.classify_batch(entry[2] for entry in batch)  # entry[2] = description
+            for entry, tag in zip(batch, tags):
+                yield [entry[0], entry[1], entry[2], tag, entry[3]]
+
+
+def expand_statement_paths(patterns):
+    """Statement files named by `patterns`: plain paths, glob patterns (** is
+    recursive) or directories (every statement file directly inside them).
+    Sorted and de-duplicated within each pattern, in pattern order."""
+    paths = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [str(p) for p in Path(pattern).iterdir() if p.suffix.lower() in STATEMENT_EXTENSIONS and p.is_file()]
+        elif glob.has_magic(pattern):
+            matches = [p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)]
+        else:
+            matches = [pattern]
+        for path in sorted(matches):
+            paths.setdefault(os.path.normpath(path))
+    return list(paths)
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Each worker process keeps its own copy of the classifier (and its tag cache)
+# for every file it parses, instead of receiving it again with each task.
+_worker_classifier = None
+
+def _init_worker(classifier):
+    global _worker_classifier
+    _worker_classifier = classifier
+    if hasattr(classifier, "take_unsaved"):
+        classifier.take_unsaved()  # entries the parent had not saved yet are its own
+
+def iter_chunks(chunks):
+    """Yield the rows of a list of chunks, letting go of each chunk once read."""
+    chunks.reverse()
+    while chunks:
+        yield from chunks.pop()
+
+def parse_statement(path, bank_name=None, classifier=None, account=None, watermarks=None):
+    """Parse and tag one statement in a pool worker, returning a picklable dict
+    with the `file`, its tagged rows as `chunks` of (amount, date, desc, tag, type)
+    tuples (minus the rows `fast_forwarded` past the account's watermark) and
+    the Importer's other `stats`; or the `error` that stopped it.
+
+    Without a `classifier` it runs as a pool worker: the worker's classifier is
+    used, and the tag `cache` entries and `hits`/`misses` it picked up are
+    returned too so the parent's CachedClassifier can merge them.
+    """
+    in_worker = classifier is None
+    if in_worker:
+        classifier = _worker_classifier
+    hits, misses = getattr(classifier, "hits", 0), getattr(classifier, "misses", 0)
+    try:
+        importer = Importer(path, bank_name, classifier=classifier, account=account, watermarks=watermarks)
+        chunks = [list(batch) for batch in batched(map(tuple, importer.entries), importer.batch_size)]
+    except (OSError, ValueError, NotImplementedError) as e:
+        return {"file": path, "error": str(e)}
+    result = {"file": path, "chunks": chunks, **importer.stats}
+    if in_worker and hasattr(classifier, "take_unsaved"):
+        result["cache"] = classifier.take_unsaved()
+        result["hits"] = classifier.hits - hits
+        result["misses"] = classifier.misses - misses
+    return result
 
+def parse_statements(paths, bank_name, classifier, workers=None, account=None, watermarks=None):
+    """Yield a result per path, in order, parsing up to `workers` files at once
+    in a process pool (one process per CPU by default): parse_statement's dict.
 
+    With a single worker (or file) nothing is parsed up front: the result holds
+    the file's `importer`, whose entries are streamed by whoever consumes them,
+    so memory stays flat however big the statement is."""
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        for path in paths:
+            try:
+                yield {"file": path, "importer": Importer(path, bank_name, classifier=classifier, account=account, watermarks=watermarks)}
+            except (OSError, ValueError, NotImplementedError) as e:
+                yield {"file": path, "error": str(e)}
+        return
+    parse = partial(parse_statement, bank_name=bank_name, account=account, watermarks=watermarks)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(classifier,)) as pool:
+        yield from pool.map(parse, paths)